@@ -1,10 +1,18 @@
-from .dir import Dir
-from .helpers import stats_nan
-from .names import Names
-from .notebook import Notebook
-from .pdf import PDF
-from .py import Py
-from .text_analysis import TextAnalysis
+import importlib
+
+# Public names are imported lazily (PEP 562), so that, for example, using Dir does
+# not pay for importing the PDF backend.
+_LAZY = {
+    "PDF": "pdf",
+    "Dir": "dir",
+    "Names": "names",
+    "Notebook": "notebook",
+    "Py": "py",
+    "TextAnalysis": "text_analysis",
+    "scan_repos": "dir",
+    "stats_many": "dir",
+    "stats_nan": "helpers",
+}
 
 __all__ = [
     "PDF",
@@ -13,5 +21,20 @@ __all__ = [
     "Notebook",
     "Py",
     "TextAnalysis",
+    "scan_repos",
+    "stats_many",
     "stats_nan",
 ]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    obj = getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
+    globals()[name] = obj  # Later lookups bypass __getattr__.
+    return obj
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
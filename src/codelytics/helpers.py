@@ -1,3 +1,14 @@
+import ast
+import concurrent.futures
+import contextlib
+import functools
+import importlib.metadata
+import multiprocessing
+import os
+import pickle
+import sys
+import warnings
+
 import numpy as np
 import pandas as pd
 
@@ -112,6 +123,10 @@ STATS_KEYS = [
 ]
 
 
+# Built once at import time; stats_nan returns renamed copies of it.
+_NAN_TEMPLATE = pd.Series(np.full(len(STATS_KEYS), np.nan), index=STATS_KEYS)
+
+
 def stats_nan(dir_name):
     """
     Create a Series with NaN values for all statistics keys.
@@ -126,4 +141,172 @@ def stats_nan(dir_name):
     pd.Series
         Series with name as index and NaN values.
     """
-    return pd.Series({key: np.nan for key in STATS_KEYS}, name=dir_name)
+    return _NAN_TEMPLATE.rename(dir_name)
+
+
+# Version of the layout of cached results (Py summaries and Dir statistics). Bump it
+# whenever their meaning changes, so that stale cache files are not reused even by a
+# development install whose package version did not change.
+CACHE_SCHEMA = 1
+
+# Packages whose versions decide the cached metrics.
+_CACHE_PACKAGES = ("codelytics", "radon", "complexipy")
+
+
+@functools.cache
+def cache_version():
+    """
+    Describe everything, besides the input itself, that cached results depend on.
+
+    Returns
+    -------
+    str
+        ``CACHE_SCHEMA``, the Python version (through the parser) and the versions of
+        codelytics, radon and complexipy. It is part of every cache key, so upgrading
+        any of them invalidates the cache.
+    """
+    versions = [str(CACHE_SCHEMA), str(sys.version_info[:2])]
+    for package in _CACHE_PACKAGES:
+        try:
+            versions.append(f"{package}={importlib.metadata.version(package)}")
+        except importlib.metadata.PackageNotFoundError:
+            versions.append(f"{package}=unknown")
+    return "\0".join(versions)
+
+
+def write_cache(cache_file, obj):
+    """
+    Pickle ``obj`` to ``cache_file``, if possible.
+
+    The object is written to a temporary file first, so concurrent runs never read a
+    partial cache file. The cache is only an optimisation, so a read-only or full
+    cache directory is ignored instead of failing the analysis.
+
+    Parameters
+    ----------
+    cache_file : pathlib.Path
+        Cache file, created along with its directory if needed.
+    obj : object
+        Picklable object to cache.
+
+    Returns
+    -------
+    bool
+        True if the cache file was written, False otherwise.
+    """
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_file, "wb") as f:
+            pickle.dump(obj, f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        with contextlib.suppress(OSError):
+            tmp_file.unlink(missing_ok=True)  # Left over if the write failed.
+        return False
+
+    return True
+
+
+def is_valid_python(source, filename="<unknown>"):
+    """
+    Check Python syntax without building a ``Py`` object.
+
+    The syntax is checked the same way as ``Py.is_valid_syntax`` (an AST-only
+    compile, so no bytecode is generated), but the tree is discarded immediately
+    instead of being cached on an intermediate object.
+
+    Parameters
+    ----------
+    source : str
+        Python source code.
+    filename : str, optional
+        File name used in syntax errors.
+
+    Returns
+    -------
+    bool
+        True if the code can be parsed, False otherwise.
+    """
+    try:
+        # Suppress SyntaxWarnings during parsing
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=SyntaxWarning)
+            compile(source, filename, "exec", ast.PyCF_ONLY_AST, dont_inherit=True)
+    except (SyntaxError, ValueError, RecursionError):
+        return False
+
+    return True
+
+
+def translate_newlines(text):
+    r"""
+    Translate "\r\n" and "\r" line endings to "\n", as reading in text mode does.
+
+    Text decoded from bytes is only copied when it has a carriage return, so this is
+    cheaper than the two ``str.replace`` calls on their own, which always copy.
+
+    Parameters
+    ----------
+    text : str
+        Decoded text.
+
+    Returns
+    -------
+    str
+        Text with universal newlines.
+    """
+    if "\r" not in text:
+        return text
+
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+# True in processes started by process_pool (set by their initializer, so it is not
+# set while a spawned process re-imports the main module).
+_in_worker = False
+
+
+def _init_worker():
+    """Mark the current process as a process_pool worker."""
+    global _in_worker  # noqa: PLW0603
+    _in_worker = True
+
+
+def in_worker():
+    """
+    Check whether the current process is a worker started by ``process_pool``.
+
+    Returns
+    -------
+    bool
+        True inside a worker process, False otherwise.
+    """
+    return _in_worker
+
+
+def process_pool(max_workers=None):
+    """
+    Create a process pool whose workers are not started with ``fork``.
+
+    Forking a multi-threaded process can deadlock the child, and codelytics uses
+    thread pools for file I/O. Workers are therefore started with ``forkserver``
+    where it is available and with ``spawn`` otherwise.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Maximum number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    concurrent.futures.ProcessPoolExecutor
+        Process pool executor.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    method = "forkserver" if "forkserver" in methods else "spawn"
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context(method),
+        initializer=_init_worker,
+    )
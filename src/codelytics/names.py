@@ -1,7 +1,75 @@
-import re
+import functools
 
+import numpy as np
 import pandas as pd
 
+# Columns of Names.stats, in the order of the values returned by _classify.
+_STATS_DTYPE = np.dtype(
+    [
+        ("n_chars", np.int64),
+        ("camel_case", np.bool_),
+        ("snake_case", np.bool_),
+        ("pascal_case", np.bool_),
+        ("private", np.bool_),
+        ("endswith_number", np.bool_),
+        ("simple", np.bool_),
+        ("ascii", np.bool_),
+    ]
+)
+
+
+def _classify(name):
+    r"""
+    Compute every statistic of ``Names.stats`` for one name in a single pass.
+
+    All of the classifiers are character class tests on the same string, so they
+    are derived from a few C-level ``str`` checks instead of running one regular
+    expression per classifier. The rules are equivalent to the patterns:
+
+    - camel case: ``^[a-z]+(?:[A-Z][a-z]*)*$``
+    - snake case: ``^[a-z]+(?:_[a-z]+)*$``
+    - Pascal case: ``^[A-Z][a-z]*(?:[A-Z][a-z]*)*$``
+    - private: ``^_``
+    - ends with number: ``\d$``
+    - simple: ``^[a-z]+$``
+    - ASCII: ``^[\x00-\x7F]*$``
+
+    Parameters
+    ----------
+    name : str
+        Name to classify.
+
+    Returns
+    -------
+    tuple
+        Values in the order of the fields of ``_STATS_DTYPE``.
+    """
+    is_ascii = name.isascii()
+    letters = is_ascii and name.isalpha()  # Only ASCII letters, and not empty.
+    first = name[:1]
+
+    # Snake case is lowercase letters split by single underscores.
+    words = name.replace("_", "")
+    snake = (
+        is_ascii
+        and words.isalpha()
+        and words.islower()
+        and first != "_"
+        and name[-1:] != "_"
+        and "__" not in name
+    )
+
+    return (
+        len(name),
+        letters and first.islower(),
+        snake,
+        letters and first.isupper(),
+        first == "_",
+        name[-1:].isdecimal(),  # isdecimal matches the digits of the regex \d.
+        letters and name.islower(),
+        is_ascii,
+    )
+
 
 class Names:
     """
@@ -20,17 +88,23 @@ class Names:
     Attributes
     ----------
     names : list of str
-        The list of user-defined names.
+        The list of unique user-defined names, in order of first occurrence.
+
+    Notes
+    -----
+    Statistics are computed once and cached on the instance, so they do not reflect
+    later changes to ``names``. Create a new ``Names`` object instead.
     """
 
     def __init__(self, names):
-        self.names = list(set(names))
+        # dict.fromkeys drops duplicates in one pass and keeps the input order.
+        self.names = list(dict.fromkeys(names))
 
     def __len__(self):
         """Return the number of names."""
         return len(self.names)
 
-    @property
+    @functools.cached_property
     def n_chars(self):
         """
         Return number of characters for each name.
@@ -40,9 +114,9 @@ class Names:
         pd.Series
             Series with name as index and number of characters as values.
         """
-        return pd.Series({name: len(name) for name in self.names}, name="n_chars")
+        return self.stats["n_chars"]
 
-    @property
+    @functools.cached_property
     def camel_case(self):
         """
         Check if names are written in pure camel case.
@@ -56,13 +130,9 @@ class Names:
             Series with name as index and boolean values indicating whether
             the name is in pure camel case.
         """
-        camel_pattern = re.compile(r"^[a-z]+(?:[A-Z][a-z]*)*$")
-        return pd.Series(
-            {name: bool(camel_pattern.match(name)) for name in self.names},
-            name="camel_case",
-        )
+        return self.stats["camel_case"]
 
-    @property
+    @functools.cached_property
     def snake_case(self):
         """
         Check if names are written in snake case.
@@ -76,13 +146,9 @@ class Names:
             Series with name as index and boolean values indicating whether
             the name is in snake case.
         """
-        snake_pattern = re.compile(r"^[a-z]+(?:_[a-z]+)*$")
-        return pd.Series(
-            {name: bool(snake_pattern.match(name)) for name in self.names},
-            name="snake_case",
-        )
+        return self.stats["snake_case"]
 
-    @property
+    @functools.cached_property
     def pascal_case(self):
         """
         Check if names are written in Pascal case.
@@ -96,13 +162,9 @@ class Names:
             Series with name as index and boolean values indicating whether
             the name is in Pascal case.
         """
-        pascal_pattern = re.compile(r"^[A-Z][a-z]*(?:[A-Z][a-z]*)*$")
-        return pd.Series(
-            {name: bool(pascal_pattern.match(name)) for name in self.names},
-            name="pascal_case",
-        )
+        return self.stats["pascal_case"]
 
-    @property
+    @functools.cached_property
     def private(self):
         """
         Check if names are private variables.
@@ -116,13 +178,9 @@ class Names:
             Series with name as index and boolean values indicating whether
             the name is a private variable.
         """
-        private_pattern = re.compile(r"^_")
-        return pd.Series(
-            {name: bool(private_pattern.match(name)) for name in self.names},
-            name="private",
-        )
+        return self.stats["private"]
 
-    @property
+    @functools.cached_property
     def endswith_number(self):
         """
         Check if names end with a number.
@@ -135,13 +193,9 @@ class Names:
             Series with name as index and boolean values indicating whether
             the name ends with a number.
         """
-        number_pattern = re.compile(r"\d$")
-        return pd.Series(
-            {name: bool(number_pattern.search(name)) for name in self.names},
-            name="endswith_number",
-        )
+        return self.stats["endswith_number"]
 
-    @property
+    @functools.cached_property
     def simple(self):
         """
         Check if names are simple (one word, all lowercase letters).
@@ -155,13 +209,9 @@ class Names:
             Series with name as index and boolean values indicating whether
             the name is simple.
         """
-        simple_pattern = re.compile(r"^[a-z]+$")
-        return pd.Series(
-            {name: bool(simple_pattern.match(name)) for name in self.names},
-            name="simple",
-        )
+        return self.stats["simple"]
 
-    @property
+    @functools.cached_property
     def ascii(self):
         """
         Check if names contain only ASCII characters.
@@ -175,12 +225,9 @@ class Names:
             Series with name as index and boolean values indicating whether
             the name contains only ASCII characters.
         """
-        ascii_pattern = re.compile(r"^[\x00-\x7F]*$")
-        return pd.Series(
-            {name: bool(ascii_pattern.match(name)) for name in self.names}, name="ascii"
-        )
+        return self.stats["ascii"]
 
-    @property
+    @functools.cached_property
     def stats(self):
         """
         Get statistics about the user-defined names.
@@ -197,16 +244,9 @@ class Names:
             - Ends with number
             - ASCII
         """
-        return pd.concat(
-            [
-                self.n_chars,
-                self.camel_case,
-                self.snake_case,
-                self.pascal_case,
-                self.private,
-                self.endswith_number,
-                self.simple,
-                self.ascii,
-            ],
-            axis=1,
+        # The rows are written straight into one typed buffer, without a list of
+        # tuples or dtype inference.
+        records = np.fromiter(
+            map(_classify, self.names), dtype=_STATS_DTYPE, count=len(self.names)
         )
+        return pd.DataFrame(records, index=self.names)
@@ -1,6 +1,35 @@
+import functools
+import json
 import pathlib
 
 import nbformat
+import nbformat.reader
+
+from .helpers import is_valid_python
+
+try:
+    # orjson is an optional, much faster drop-in for json.loads.
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data):
+    """
+    Decode JSON with ``orjson`` if it is installed, and with ``json`` otherwise.
+
+    ``orjson`` is stricter than ``json.loads``: it rejects, for example, a leading
+    UTF-8 byte order mark, ``NaN`` and lone surrogates. Content it rejects is
+    decoded again with ``json.loads``, so the same notebooks load with or without
+    the ``fast`` extra.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+
+    return json.loads(data)
 
 
 class Notebook:
@@ -14,13 +43,26 @@ class Notebook:
     ----------
     path : pathlib.Path or str
         Path to the Jupyter notebook file (.ipynb).
+    data : bytes or str, optional
+        Raw content of the notebook file, if it has already been read. When given,
+        the file at ``path`` is not opened again.
+    outputs : bool, default True
+        Whether to keep the outputs of code cells. Outputs (plots, tables, logs)
+        are often the bulk of a notebook but are never used by ``extract`` or
+        ``n_cells``, so dropping them saves memory and parsing time.
+
+    Attributes
+    ----------
+    nb : nbformat.NotebookNode
+        Parsed notebook. It is built on first access: ``n_cells`` and ``extract``
+        read the decoded JSON directly, without creating ``NotebookNode`` objects.
 
     """
 
-    def __init__(self, path):
+    def __init__(self, path, data=None, outputs=True):
         path = pathlib.Path(path)
 
-        if not path.exists():
+        if data is None and not path.exists():
             raise FileNotFoundError(f"Notebook file not found: {path}")
 
         if not path.suffix == ".ipynb":
@@ -29,11 +71,117 @@ class Notebook:
         self.path = path
 
         try:
-            with open(path, encoding="utf-8") as f:
-                self.nb = nbformat.read(f, as_version=nbformat.NO_CONVERT)
+            if data is None:
+                data = path.read_bytes()
+            self._nb_dict, self._version = self._parse(data, outputs=outputs)
         except Exception as e:
             raise ValueError(f"Invalid notebook file format: {e}")
 
+    @functools.cached_property
+    def nb(self):
+        """Parsed notebook, converted from the decoded JSON on first access."""
+        major, minor = self._version
+        return nbformat.versions[major].to_notebook_json(self._nb_dict, minor=minor)
+
+    @staticmethod
+    def _parse(data, outputs=True):
+        """
+        Decode raw notebook content and check its format version.
+
+        Together with the conversion in ``nb``, this is equivalent to
+        ``nbformat.reads(data, as_version=nbformat.NO_CONVERT)``, but the JSON is
+        decoded with ``orjson`` when it is installed, and the (slow) schema
+        validation, which only logs problems, is skipped.
+
+        Parameters
+        ----------
+        data : bytes or str
+            Raw notebook content.
+        outputs : bool, default True
+            Whether to keep the outputs of code cells.
+
+        Returns
+        -------
+        dict
+            Decoded notebook.
+        tuple of int
+            Major and minor format version.
+
+        Raises
+        ------
+        ValueError
+            If the content is not JSON, its format version is not supported, or
+            its cells are not shaped like notebook cells.
+        """
+        nb_dict = _json_loads(data)
+        if not isinstance(nb_dict, dict):
+            raise ValueError("Notebook content must be a JSON object")
+        major, minor = nbformat.reader.get_version(nb_dict)
+        if major not in nbformat.versions:
+            raise ValueError(f"Unsupported notebook format version: {major}")
+        if major == 4:
+            # Version 4 cells are read from the decoded JSON (see _by_type), so
+            # check their shape here instead of failing later in extract or n_cells.
+            Notebook._check_cells(nb_dict)
+        if not outputs:
+            # Drop outputs before they are converted to NotebookNode objects.
+            for cell in nb_dict.get("cells", ()):
+                cell.pop("outputs", None)
+        return nb_dict, (major, minor)
+
+    @staticmethod
+    def _check_cells(nb_dict):
+        """
+        Check that a version 4 notebook has a list of cells with text sources.
+
+        Parameters
+        ----------
+        nb_dict : dict
+            Decoded notebook.
+
+        Raises
+        ------
+        ValueError
+            If ``cells`` is missing or not a list, a cell is not an object, or a
+            cell source is neither a string nor a list of strings.
+        """
+        cells = nb_dict.get("cells")
+        if not isinstance(cells, list):
+            raise ValueError("Notebook cells must be a list")
+        for i, cell in enumerate(cells):
+            if not isinstance(cell, dict):
+                raise ValueError(f"Notebook cell {i} must be an object")
+            source = cell.get("source", "")
+            if not (
+                isinstance(source, str)
+                or (
+                    isinstance(source, list)
+                    and all(isinstance(line, str) for line in source)
+                )
+            ):
+                raise ValueError(
+                    f"Notebook cell {i} source must be a string or a list of strings"
+                )
+
+    @functools.cached_property
+    def _by_type(self):
+        """
+        Cell sources grouped by cell type (in notebook order), built in a single pass.
+
+        Version 4 notebooks are read from the decoded JSON, where sources may be
+        lists of lines, so no NotebookNode objects are created.
+        """
+        cells = self._nb_dict["cells"] if self._version[0] == 4 else self.nb.cells
+
+        by_type = {}
+        for cell in cells:
+            source = cell.get("source", "")
+            if isinstance(source, list):
+                source = "".join(source)
+            by_type.setdefault(cell.get("cell_type"), []).append(source)
+
+        return by_type
+
     def n_cells(self, cell_type=None):
         """
         Return the number of cells in the notebook.
@@ -53,9 +201,9 @@ class Notebook:
             Number of cells of the specified type.
         """
         if cell_type is None:
-            return len(self.nb.cells)
+            return sum(map(len, self._by_type.values()))
 
-        return len([cell for cell in self.nb.cells if cell.cell_type == cell_type])
+        return len(self._by_type.get(cell_type, ()))
 
     def extract(self, cell_type):
         """
@@ -86,15 +234,14 @@ class Notebook:
 
             valid_cells = []
 
-            for cell in self.nb.cells:
-                if cell.cell_type == cell_type and cell.source.strip():
-                    # Check if this individual cell has valid syntax
-                    try:
-                        if Py(cell.source).is_valid_syntax:
-                            valid_cells.append(cell.source)
-                    except Exception:
-                        # Skip cells that can't be processed at all
-                        continue
+            # Cells are checked serially: syntax checks run at a few MB/s, while
+            # starting a process pool takes seconds, so a pool would only pay off for
+            # notebooks with many megabytes of code. Dir can spread notebooks over
+            # worker processes instead (see its workers arguments).
+            for source in self._by_type.get(cell_type, ()):
+                # Check the syntax of each cell without building a Py object per cell
+                if source.strip() and is_valid_python(source, "<cell>"):
+                    valid_cells.append(source)
 
             return Py("\n\n".join(valid_cells))
 
@@ -103,9 +250,9 @@ class Notebook:
 
             content = "\n\n".join(
                 [
-                    cell.source
-                    for cell in self.nb.cells
-                    if cell.cell_type == cell_type and cell.source.strip()
+                    source
+                    for source in self._by_type.get(cell_type, ())
+                    if source.strip()
                 ]
             )
             return TextAnalysis([content])
@@ -1,12 +1,46 @@
+import functools
 import pathlib
 import re
 
 import fitz  # PyMuPDF
 
+# Normalised reference section headings (also factored in _REFERENCE_HEADING)
+_REFERENCE_TERMS = (
+    "references",
+    "reference",
+    "referances",
+    "bibliography",
+    "works cited",
+    "work cited",
+    "literature cited",
+    "sources",
+    "citations",
+)
+
+# Stand-alone reference section heading, matched against a whole stripped line:
+# - optional numbered prefix (1, 1.2, 1.2.3., etc.)
+# - optional whitespace between parts
+# - optional colon at the end
+# Lines are matched one by one: a single MULTILINE search over the page is slower
+# in CPython, and its ^ and $ do not split lines on the same characters as
+# str.splitlines. The terms are factored by common prefix and suffix, so the regex
+# engine tries fewer alternatives per line.
+_REFERENCE_HEADING = re.compile(
+    r"(?:\d+(?:\.\d+)*\.?)?\s*"
+    r"(?:re(?:ferences?|ferances)|bibliography|(?:works?|literature) cited|sources"
+    r"|citations)"
+    r"\s*:?",
+    re.IGNORECASE,
+)
+
 
 class PDF:
     """A class for reading and analysing PDF files.
 
+    The PDF is opened once, on first use, and the text of each page is extracted at
+    most once, so calling several methods does not parse the file again. Call
+    ``close`` (or use the object as a context manager) to release the file.
+
     Parameters
     ----------
     path : str or pathlib.Path
@@ -23,7 +57,51 @@ class PDF:
         if not self.path.exists():
             raise FileNotFoundError(f"PDF file not found: {self.path}")
 
-    def references_page(self):
+        self._texts = {}
+        self._word_counts = {}
+
+    def __enter__(self):
+        """Return the PDF object itself."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the PDF document."""
+        self.close()
+
+    @functools.cached_property
+    def _doc(self):
+        """
+        The opened PDF document, shared by all methods.
+
+        Pages are processed serially: PyMuPDF is not thread-safe, and it holds the
+        GIL while extracting text, so threads would not run extractions in parallel.
+        """
+        return fitz.open(self.path)
+
+    def _text(self, page_idx):
+        """Return the text of a page (0-indexed), extracting it only once."""
+        if page_idx not in self._texts:
+            # The default flags are kept: dropping ligature or whitespace handling
+            # is not measurably faster, and inhibiting spaces changes word counts.
+            self._texts[page_idx] = self._doc.load_page(page_idx).get_text()
+
+        return self._texts[page_idx]
+
+    def _n_words(self, page_idx):
+        """Return the number of words on a page (0-indexed), counting them only once."""
+        if page_idx not in self._word_counts:
+            # str.split runs in C and its list only lives for one page, which is
+            # several times faster than counting regex matches without a list.
+            self._word_counts[page_idx] = len(self._text(page_idx).split())
+
+        return self._word_counts[page_idx]
+
+    def close(self):
+        """Close the PDF document, if it has been opened."""
+        if "_doc" in self.__dict__:
+            self.__dict__.pop("_doc").close()
+
+    def references_page(self, start_fraction=0):
         """
         Locate the *last* page on which a references section heading appears.
 
@@ -31,6 +109,15 @@ class PDF:
         stand-alone heading such as “References”, “Bibliography”, “Works Cited”,
         etc. is found, that page number is returned.
 
+        Parameters
+        ----------
+        start_fraction : float, default 0
+            Fraction of the pages at the start of the PDF that are not searched. By
+            default every page is searched. A references section rarely appears in
+            the first pages, where a heading is usually a false positive (such as a
+            table of contents entry), so passing, for example, 0.4 skips those pages
+            and makes the search faster.
+
         Returns
         -------
         int or None
@@ -43,45 +130,27 @@ class PDF:
             For any other problem while reading the PDF.
 
         """
-        # List of normalised reference section keywords
-        keyword_pattern = "|".join(
-            re.escape(term)
-            for term in [
-                "references",
-                "reference",
-                "referances",
-                "bibliography",
-                "works cited",
-                "work cited",
-                "literature cited",
-                "sources",
-                "citations",
-            ]
-        )
-
-        # Final compiled regex:
-        # - optional numbered prefix (1, 1.2, 1.2.3., etc.)
-        # - optional whitespace between parts
-        # - optional colon at the end
-        pattern = re.compile(
-            rf"^\s*(\d+(\.\d+)*\.?)?\s*({keyword_pattern})\s*:?\s*$", re.IGNORECASE
-        )
-
         try:
-            with fitz.open(self.path) as doc:
-                # Iterate from the last page to the first.
-                for page_idx in range(len(doc) - 1, -1, -1):
-                    page_number = page_idx + 1  # convert to 1-indexed
-                    text = doc.load_page(page_idx).get_text()
-                    if not text:
-                        continue
+            n_pages = len(self._doc)
+            first_idx = max(0, int(n_pages * start_fraction))
+
+            # Iterate from the last page to the first searched page.
+            for page_idx in range(n_pages - 1, first_idx - 1, -1):
+                page_number = page_idx + 1  # convert to 1-indexed
+                text = self._text(page_idx)
 
-                    for line in text.splitlines():
-                        if pattern.match(line.strip()):
-                            return page_number
+                # Most pages do not mention any heading at all, which a substring
+                # search finds much faster than matching every line.
+                lowered = text.lower()
+                if not any(term in lowered for term in _REFERENCE_TERMS):
+                    continue
 
-                # If no references section is found, return None.
-                return None
+                for line in text.splitlines():
+                    if _REFERENCE_HEADING.fullmatch(line.strip()):
+                        return page_number
+
+            # If no references section is found, return None.
+            return None
 
         except Exception as exc:
             raise RuntimeError(f"Error processing PDF file: {exc}") from exc
@@ -102,8 +171,7 @@ class PDF:
             For any problem while reading the PDF.
         """
         try:
-            with fitz.open(self.path) as doc:
-                return len(doc)
+            return len(self._doc)
         except Exception as exc:
             raise RuntimeError(f"Error processing PDF file: {exc}") from exc
 
@@ -130,27 +198,31 @@ class PDF:
             For any other problem while reading the PDF.
 
         """
+        # Exact page numbers are kept in a set, while '>N' only lowers the number of
+        # pages to read, so pages after it are never loaded or extracted.
         ignore_set = set()
+        last_page = None
         if ignore_pages:
             for item in ignore_pages:
                 if isinstance(item, int):
                     ignore_set.add(item)
                 elif isinstance(item, str) and item.startswith(">"):
-                    ignore_set.update(
-                        [i for i in range(int(item[1:]) + 1, self.n_pages + 1)]
-                    )
+                    after = int(item[1:])
+                    last_page = after if last_page is None else min(last_page, after)
                 else:
                     raise ValueError(f"Invalid ignore_pages entry: {item}")
 
         words = 0
         try:
-            with fitz.open(self.path) as doc:
-                for page_number, page in enumerate(doc, start=1):  # 1-indexed
-                    if page_number in ignore_set:
-                        continue
+            n_pages = len(self._doc)
+            if last_page is not None:
+                n_pages = min(n_pages, last_page)
+
+            for page_idx in range(max(n_pages, 0)):
+                if page_idx + 1 in ignore_set:  # 1-indexed
+                    continue
 
-                    if text := page.get_text():
-                        words += len(text.split())
+                words += self._n_words(page_idx)
 
             return words
 
@@ -1,17 +1,483 @@
 import ast
 import functools
+import hashlib
 import io
+import os
 import pathlib
+import pickle
+import statistics
 import tokenize
+import typing
 import warnings
 
 import complexipy
 import pandas as pd
 import radon
-import radon.complexity
 import radon.metrics
+import radon.raw
 import radon.visitors
 
+from .helpers import (
+    cache_version,
+    in_worker,
+    process_pool,
+    translate_newlines,
+    write_cache,
+)
+
+# Node types are compared exactly (AST node classes are never subclassed), so a set
+# lookup replaces isinstance checks against unions.
+# Nodes that add a decision point to the cyclomatic complexity.
+_DECISION_NODES = frozenset(
+    {
+        ast.If,
+        ast.While,
+        ast.For,
+        ast.AsyncFor,
+        ast.Try,
+        ast.ExceptHandler,
+        ast.With,
+        ast.AsyncWith,
+        ast.BoolOp,  # and, or operators
+    }
+)
+_FUNCTION_NODES = frozenset({ast.FunctionDef, ast.AsyncFunctionDef})
+_SEQUENCE_NODES = frozenset({ast.Tuple, ast.List})
+_HALSTEAD_METRICS = ("vocabulary", "length", "volume", "difficulty", "effort")
+# Index of the Series of Py.halstead (building one from a dict is slower).
+_HALSTEAD_INDEX = pd.Index(_HALSTEAD_METRICS)
+
+# Fields of compound statements (and of their handlers and cases) holding statements.
+_BLOCK_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+# Fields that only hold expression contexts and operators (Load, Add, And, Eq, ...).
+# No metric reads these leaves, so the walk does not visit them.
+_LEAF_FIELDS = frozenset({"ctx", "op", "ops"})
+# Fields of each node type that the walk visits, filled as node types are met.
+_CHILD_FIELDS = {}
+
+
+class _AstStats:
+    """Metrics of Py collected in one walk of the AST."""
+
+    __slots__ = (
+        "docstrings",
+        "function_complexities",
+        "imported_modules",
+        "module_complexity",
+        "n_imports",
+        "names",
+    )
+
+    def __init__(self):
+        self.n_imports = 0
+        self.imported_modules = set()
+        # The module and each function start with a base complexity of 1.
+        self.module_complexity = 1
+        self.function_complexities = []
+        self.names = set()
+        self.docstrings = []
+
+
+def _add_target_names(names, target, attributes=False):
+    """Add the names bound by an assignment target (and attributes if requested)."""
+    target_type = type(target)
+    if target_type is ast.Name:
+        names.add(target.id)
+    elif target_type in _SEQUENCE_NODES:
+        for elt in target.elts:
+            if type(elt) is ast.Name:
+                names.add(elt.id)
+    elif attributes and target_type is ast.Attribute:
+        # Class attributes (self.attr = value)
+        names.add(target.attr)
+
+
+def _add_docstring(node, stats):
+    """Add the docstring of a module, class or function if it has one."""
+    if docstring := (ast.get_docstring(node, clean=False) or "").strip():
+        stats.docstrings.append(docstring)
+
+
+# Imports are statements, so a walk over statement bodies alone would find them.
+# They are collected in the shared walk instead, which visits expressions for the
+# other metrics anyway: a separate walk would add about 20% to it, and parsing
+# still costs more than either walk when only the imports are asked for.
+def _visit_import(node, stats):
+    stats.n_imports += 1
+    # Handle: import module, import module.submodule
+    for alias in node.names:
+        stats.imported_modules.add(alias.name.partition(".")[0])
+
+
+def _visit_import_from(node, stats):
+    stats.n_imports += 1
+    # Handle: from module import something
+    if node.module:  # Skip relative imports (from . import ...)
+        stats.imported_modules.add(node.module.partition(".")[0])
+
+
+def _visit_function(node, stats):
+    stats.names.add(node.name)
+    # Function parameters
+    for arg in (*node.args.posonlyargs, *node.args.args, *node.args.kwonlyargs):
+        stats.names.add(arg.arg)
+    if node.args.vararg:
+        stats.names.add(node.args.vararg.arg)
+    if node.args.kwarg:
+        stats.names.add(node.args.kwarg.arg)
+    _add_docstring(node, stats)
+
+
+def _visit_class(node, stats):
+    stats.names.add(node.name)
+    _add_docstring(node, stats)
+
+
+def _visit_assign(node, stats):
+    for target in node.targets:
+        _add_target_names(stats.names, target, attributes=True)
+
+
+def _visit_target(node, stats):
+    # Augmented (+=) and annotated (var: type = value) assignments.
+    _add_target_names(stats.names, node.target, attributes=True)
+
+
+def _visit_named_expr(node, stats):
+    # Named expressions (walrus operator :=)
+    if type(node.target) is ast.Name:
+        stats.names.add(node.target.id)
+
+
+def _visit_for(node, stats):
+    _add_target_names(stats.names, node.target)
+
+
+def _visit_comprehension(node, stats):
+    for generator in node.generators:
+        _add_target_names(stats.names, generator.target)
+
+
+def _visit_except_handler(node, stats):
+    if node.name:
+        stats.names.add(node.name)
+
+
+def _visit_withitem(node, stats):
+    if node.optional_vars:
+        _add_target_names(stats.names, node.optional_vars)
+
+
+def _visit_scope_declaration(node, stats):
+    # Global and nonlocal declarations
+    stats.names.update(node.names)
+
+
+# Handlers looked up by the exact node type, instead of chained isinstance checks.
+_AST_VISITORS = {
+    ast.Module: _add_docstring,
+    ast.Import: _visit_import,
+    ast.ImportFrom: _visit_import_from,
+    ast.FunctionDef: _visit_function,
+    ast.AsyncFunctionDef: _visit_function,
+    ast.ClassDef: _visit_class,
+    ast.Assign: _visit_assign,
+    ast.AugAssign: _visit_target,
+    ast.AnnAssign: _visit_target,
+    ast.NamedExpr: _visit_named_expr,
+    ast.For: _visit_for,
+    ast.ListComp: _visit_comprehension,
+    ast.SetComp: _visit_comprehension,
+    ast.DictComp: _visit_comprehension,
+    ast.GeneratorExp: _visit_comprehension,
+    ast.ExceptHandler: _visit_except_handler,
+    ast.withitem: _visit_withitem,
+    ast.Global: _visit_scope_declaration,
+    ast.Nonlocal: _visit_scope_declaration,
+}
+
+
+def _walk_stats(tree):
+    """
+    Collect imports, complexity, user-defined names and docstrings in one walk.
+
+    The tree is walked breadth-first, in the same order as ``ast.walk``, so the
+    docstrings keep their order. Each node carries the indices of the functions
+    that enclose it, so its decision points are added to the module and to all of
+    those functions without walking each function again.
+
+    The queue is a list read by index, and children are read from the node fields
+    directly, because the generators of ``ast.walk`` and ``ast.iter_child_nodes``
+    make the walk about twice as slow. Contexts and operators are skipped.
+
+    The node types are not flattened into an array to count them with NumPy (or
+    Numba): flattening needs the same walk over the nodes, costing over 80% of
+    this one, and names and docstrings are read from the nodes themselves. Nor is
+    the walk compiled with Cython or mypyc, which would make the package a binary
+    distribution: it still reads Python AST objects, and parsing the source costs
+    about three times as much as this walk.
+    """
+    stats = _AstStats()
+    complexities = stats.function_complexities
+    todo = [tree]
+    enclosing = [()]  # Indices of the functions enclosing each node in todo.
+    # List iterators also yield the items appended while iterating.
+    for node, functions in zip(todo, enclosing):
+        node_type = type(node)
+
+        if node_type in _DECISION_NODES:
+            decisions = 1
+        elif node_type is ast.comprehension:
+            # List/dict/set comprehensions with conditions
+            decisions = len(node.ifs)
+        else:
+            decisions = 0
+        if decisions:
+            stats.module_complexity += decisions
+            for index in functions:
+                complexities[index] += decisions
+
+        if visit := _AST_VISITORS.get(node_type):
+            visit(node, stats)
+        children_functions = functions
+        if node_type in _FUNCTION_NODES:
+            children_functions = (*functions, len(complexities))
+            complexities.append(1)
+
+        fields = _CHILD_FIELDS.get(node_type)
+        if fields is None:
+            fields = _CHILD_FIELDS[node_type] = tuple(
+                field for field in node_type._fields if field not in _LEAF_FIELDS
+            )
+        for field in fields:
+            value = getattr(node, field, None)
+            if type(value) is list:
+                for child in value:
+                    if isinstance(child, ast.AST):
+                        todo.append(child)
+                        enclosing.append(children_functions)
+            elif isinstance(value, ast.AST):
+                todo.append(value)
+                enclosing.append(children_functions)
+    return stats
+
+
+def _count_definitions(tree):
+    """
+    Count the functions and classes that radon's ``cc_visit`` reports as blocks.
+
+    Those are the functions and classes defined outside of any function or class,
+    and the methods of those classes, including definitions inside compound
+    statements. Definitions are statements, so only the statement lists of the
+    module and of its classes are scanned, and function bodies are skipped.
+
+    Returns
+    -------
+    tuple of int
+        Numbers of functions (including methods) and of classes.
+    """
+    n_functions = n_classes = 0
+    todo = [(tree.body, False)]
+    # List iterators also yield the items appended while iterating.
+    for body, in_class in todo:
+        for node in body:
+            node_type = type(node)
+            if node_type in _FUNCTION_NODES:
+                n_functions += 1
+            elif node_type is ast.ClassDef:
+                # Classes nested in classes are not blocks, nor are their methods.
+                if not in_class:
+                    n_classes += 1
+                    todo.append((node.body, True))
+            else:
+                for field in _BLOCK_FIELDS:
+                    if block := getattr(node, field, None):
+                        todo.append((block, in_class))
+    return n_functions, n_classes
+
+
+def _logical_lines(significant):
+    """
+    Count the logical lines of one statement as ``radon.raw._logical`` does.
+
+    ``significant`` holds the ``(type, string)`` pairs of the statement's tokens,
+    without comments and newlines. Like radon, a part split on ";" counts twice if
+    it has a colon that does not end it (``if x: return``), and parts after the
+    last ";" are compared with the end marker that radon's tokens end with.
+    """
+    parts = [[]]
+    for token in significant:
+        if token == (tokenize.OP, ";"):
+            parts.append([])
+        else:
+            parts[-1].append(token)
+
+    count = 0
+    for index, part in enumerate(parts):
+        last = index == len(parts) - 1
+        colons = [i for i, token in enumerate(part) if token == (tokenize.OP, ":")]
+        if colons:
+            # radon compares with the second last token, which is the end marker
+            # after the last part.
+            count += 2 - (colons[-1] == len(part) - (1 if last else 2))
+        elif part:
+            count += 1
+    return count
+
+
+def _raw_analysis(source):
+    """
+    Compute ``radon.raw.analyze`` with one pass of the tokenizer.
+
+    radon strips every line and tokenizes it on its own, re-tokenizing growing
+    groups of lines until a multi-line statement or string tokenizes, which is
+    quadratic in the length of docstrings and long statements. Tokenizing all of
+    the stripped lines at once gives the same tokens, and each statement (the
+    group radon would tokenize) ends at a NEWLINE token, or at an NL token outside
+    brackets. Where one pass could group the lines differently (sources that do
+    not tokenize, and some invalid code), radon is called instead, so its result
+    (or its error) is kept.
+
+    Parameters
+    ----------
+    source : str
+        Python source code.
+
+    Returns
+    -------
+    radon.raw.Module
+        The same raw metrics as ``radon.raw.analyze``.
+    """
+    lines = [line.strip() for line in source.splitlines()]
+    text = "\n".join(lines)
+    # A line continued into a blank line joins it differently in one pass than in
+    # radon's line by line retries (it is invalid code anyway).
+    if "\\\n\n" in text or text.endswith(("\\", "\\\n")):
+        return radon.raw.analyze(source)
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(text).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return radon.raw.analyze(source)
+
+    lloc = comments = single_comments = multi = blank = sloc = 0
+    first_row = 1  # First line of the current statement.
+    depth = 0  # Open brackets.
+    fstrings = 0  # Open f-strings.
+    n_comments = 0
+    significant = []
+    first = None  # First token of the current statement.
+
+    for token in tokens:
+        token_type = token.type
+        if first is None:
+            first = token
+        if token_type == tokenize.ERRORTOKEN:
+            return radon.raw.analyze(source)
+        if token_type == tokenize.COMMENT:
+            n_comments += 1
+            continue
+        if not (
+            token_type == tokenize.NEWLINE or (token_type == tokenize.NL and not depth)
+        ):
+            if token_type not in (tokenize.NL, tokenize.ENDMARKER):
+                significant.append((token_type, token.string))
+                if token_type == tokenize.OP:
+                    if token.string in "([{":
+                        depth += 1
+                    elif token.string in ")]}" and depth:
+                        depth -= 1
+                elif token_type == tokenize.FSTRING_START:
+                    fstrings += 1
+                elif token_type == tokenize.FSTRING_END:
+                    fstrings -= 1
+            continue
+
+        # The statement ends on this line. In invalid code, the tokenizer can end
+        # one inside brackets or an f-string, where radon would not split it.
+        if depth or fstrings:
+            return radon.raw.analyze(source)
+        last_row = token.start[0]
+        statement_lines = lines[first_row - 1 : last_row]
+        comments += n_comments
+        if first.type == tokenize.COMMENT and not significant:
+            single_comments += 1
+        elif first.type == tokenize.STRING and len(significant) == 1 and not n_comments:
+            if first.start[0] == first.end[0]:
+                single_comments += 1
+            else:
+                multi += sum(1 for line in statement_lines if line)
+                blank += sum(1 for line in statement_lines if not line)
+        else:
+            sloc += sum(1 for line in statement_lines if line)
+            blank += sum(1 for line in statement_lines if not line)
+        lloc += _logical_lines(significant)
+
+        first_row = last_row + 1
+        n_comments = 0
+        significant = []
+        first = None
+
+    # Lines after the last statement can only be blank, as radon sees them.
+    rest = lines[first_row - 1 :]
+    if significant or n_comments or any(rest):
+        return radon.raw.analyze(source)
+    blank += len(rest)
+
+    loc = sloc + blank + multi + single_comments
+    return radon.raw.Module(loc, lloc, sloc, comments, multi, blank, single_comments)
+
+
+class _HalsteadCounts(typing.NamedTuple):
+    """Operators and operands seen by radon's HalsteadVisitor, without the AST."""
+
+    operators_seen: set
+    operands_seen: set
+    operators: int
+    operands: int
+    functions: list
+
+    # radon.metrics.halstead_visitor_report reads these visitor properties.
+    @property
+    def distinct_operators(self):
+        return len(self.operators_seen)
+
+    @property
+    def distinct_operands(self):
+        return len(self.operands_seen)
+
+
+class _PySummary(typing.NamedTuple):
+    """Metrics of one source that ``Py.aggregate`` combines (small and picklable)."""
+
+    radon_analysis: typing.Any
+    n_char: int
+    n_functions: int
+    n_classes: int
+    n_imports: int
+    imported_modules: set
+    mccabe: tuple
+    cognitive: tuple
+    halstead: _HalsteadCounts
+    comments: list
+    docstrings: list
+    names: set
+
+
+# Metrics computed by Py.analyse_many by default (each gives one value per file).
+_MANY_METRICS = (
+    "n_char",
+    "lloc",
+    "n_functions",
+    "n_classes",
+    "n_imports",
+    "mccabe",
+    "cognitive_complexity",
+)
+
+# Below this number of files, Py.analyse_many is faster without a process pool.
+_PARALLEL_MIN_FILES = 8
+
 
 class Py:
     """Analyse Python code metrics.
@@ -39,12 +505,149 @@ class Py:
                 raise FileNotFoundError(f"Python file not found: {source}")
             if not source.suffix == ".py":
                 raise ValueError(f"File must have .py extension: {source}")
-            self.content = source.read_text(encoding="utf-8")
+            # Decoding the bytes skips the text layer, which is slower than the
+            # decode and newline translation it would do.
+            self.content = translate_newlines(source.read_bytes().decode("utf-8"))
         elif isinstance(source, str):
             self.content = source
         else:
             raise TypeError("Source must be a pathlib.Path object or string")
 
+    @classmethod
+    def aggregate(cls, pys, cache_dir=None):
+        """
+        Combine the metrics of many Python sources without re-parsing them together.
+
+        Each source is analysed on its own and reduced to a small summary, so the
+        sources are never concatenated and parsed as one (much slower) module.
+        Counts are summed, imported modules and user-defined names are merged, and
+        per-function statistics pool the functions of all sources. Sources with
+        invalid syntax are skipped.
+
+        Parameters
+        ----------
+        pys : Iterable of Py
+            Python sources to combine. They are consumed one at a time, so only one
+            parsed source is held in memory at once.
+        cache_dir : str or pathlib.Path, optional
+            Directory in which to keep the summary of each source between runs,
+            keyed by a hash of its content, so unchanged sources are neither parsed
+            nor analysed again. Cache files are pickles, so only use a directory you
+            trust. By default, nothing is cached on disk.
+
+        Returns
+        -------
+        Py
+            Object with the same metrics interface as Py. Its ``content`` is None,
+            because the sources are not concatenated.
+        """
+        if cache_dir is None:
+            summaries = [py._summary() for py in pys if py.is_valid_syntax]
+        else:
+            cache_dir = pathlib.Path(cache_dir)
+            summaries = [
+                summary
+                for py in pys
+                if (summary := py._cached_summary(cache_dir)) is not None
+            ]
+        return _PyAggregate(summaries) if summaries else cls("")
+
+    def _cached_summary(self, cache_dir):
+        """
+        Load the ``_summary`` of this source from ``cache_dir``, or compute and save it.
+
+        Returns None if the source has invalid syntax, which is cached as well.
+        """
+        # The summary depends on its own layout, and on the versions of Python and
+        # of the metric packages, so all of them are part of the key.
+        key = hashlib.sha256(f"{cache_version()}\0{_PySummary._fields}\0".encode())
+        key.update(self.content.encode("utf-8", "surrogatepass"))
+        cache_file = cache_dir / f"{key.hexdigest()}.pkl"
+        try:
+            with open(cache_file, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            # A missing or unreadable cache file is simply recomputed.
+            pass
+
+        summary = self._summary() if self.is_valid_syntax else None
+        write_cache(cache_file, summary)
+        return summary
+
+    @classmethod
+    def analyse_many(cls, paths, metrics=_MANY_METRICS, workers=None):
+        """
+        Compute metrics of many Python files in parallel.
+
+        Each file is analysed on its own in a worker process, so the analysis scales
+        with the number of cores. Only the values of the metrics are sent back, not
+        the parsed files. As with ``scan_repos``, scripts calling this method must
+        guard their entry point with ``if __name__ == "__main__":``.
+
+        Parameters
+        ----------
+        paths : Iterable of str or pathlib.Path
+            Python files to analyse.
+        metrics : Iterable of str, optional
+            Names of Py properties, or of methods called with their default
+            arguments, each giving one value per file. Defaults to the counts of
+            characters, logical lines, functions, classes and imports, and the mean
+            McCabe and cognitive complexities per function.
+        workers : int, optional
+            Number of worker processes. Defaults to the number of CPUs. With one
+            worker, or fewer than eight files, the files are analysed in this
+            process instead.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per file, indexed by path, with a column for each metric.
+        """
+        paths = [pathlib.Path(path) for path in paths]
+        metrics = list(metrics)
+        analyse = functools.partial(_analyse_file, metrics=metrics)
+
+        workers = workers or os.cpu_count() or 1
+
+        # Worker processes (e.g. from scan_repos) do not start pools of their own.
+        if workers == 1 or len(paths) < _PARALLEL_MIN_FILES or in_worker():
+            rows = list(map(analyse, paths))
+        else:
+            chunksize = max(1, len(paths) // (workers * 4))
+            with process_pool(workers) as executor:
+                rows = list(executor.map(analyse, paths, chunksize=chunksize))
+
+        return pd.DataFrame.from_records(
+            rows,
+            index=pd.Index([str(path) for path in paths], name="path"),
+            columns=metrics,
+        )
+
+    def _summary(self):
+        """Reduce the metrics of this (valid) source to a ``_PySummary``."""
+        halstead = self._halstead
+        return _PySummary(
+            radon_analysis=self.radon_analysis,
+            n_char=self.n_char,
+            n_functions=self.n_functions,
+            n_classes=self.n_classes,
+            n_imports=self.n_imports,
+            imported_modules=self._imported_modules,
+            mccabe=self._mccabe,
+            cognitive=self._cognitive,
+            # Operands that radon keeps as AST nodes are only compared by identity,
+            # so they are replaced by placeholders to release the tree.
+            halstead=halstead._replace(
+                operands_seen={
+                    (context, object() if isinstance(operand, ast.AST) else operand)
+                    for context, operand in halstead.operands_seen
+                }
+            ),
+            comments=self.comments.texts,
+            docstrings=self.docstrings.texts,
+            names=set(self.user_defined_names.names),
+        )
+
     @functools.cached_property
     def radon_analysis(self):
         """
@@ -77,7 +680,7 @@ class Py:
             etc. Returns None if the content cannot be parsed.
         """
         try:
-            return radon.raw.analyze(self.content)
+            return _raw_analysis(self.content)
         except Exception:
             return None
 
@@ -116,12 +719,13 @@ class Py:
         return len(self.content)
 
     @functools.cached_property
-    def _cc_results(self):
-        """Cache the cc_visit results for reuse across methods."""
-        try:
-            return radon.complexity.cc_visit(self.content)
-        except Exception:
+    def _definitions(self):
+        """Cache the numbers of functions and classes (as counted by radon)."""
+        # Running radon's cc_visit to count its blocks would also compute their
+        # complexity and visit every node, so only the definitions are scanned.
+        if self._ast_tree is None:
             return None
+        return _count_definitions(self._ast_tree)
 
     @property
     def n_functions(self):
@@ -138,15 +742,7 @@ class Py:
         int
             Total number of function definitions.
         """
-        return (
-            sum(
-                1
-                for item in self._cc_results
-                if isinstance(item, radon.visitors.Function)
-            )
-            if self._cc_results is not None
-            else None
-        )
+        return self._definitions[0] if self._definitions is not None else None
 
     @property
     def n_classes(self):
@@ -161,13 +757,7 @@ class Py:
         int
             Total number of class definitions.
         """
-        return (
-            sum(
-                1 for item in self._cc_results if isinstance(item, radon.visitors.Class)
-            )
-            if self._cc_results is not None
-            else None
-        )
+        return self._definitions[1] if self._definitions is not None else None
 
     @functools.cached_property
     def _ast_tree(self):
@@ -176,8 +766,14 @@ class Py:
             # Suppress SyntaxWarnings during parsing
             with warnings.catch_warnings():
                 warnings.filterwarnings("ignore", category=SyntaxWarning)
+                # The text is parsed rather than the bytes of the file: parsing bytes
+                # is only ~2% faster, the other metrics need the text anyway, and a
+                # coding declaration could make the parser decode bytes differently.
                 return ast.parse(self.content)
         except Exception:
+            # None rather than an empty ast.Module: once cached, checking
+            # is_valid_syntax is a dict lookup (~15 ns), and an empty tree would
+            # turn the None results for invalid code into zeros.
             return None
 
     @functools.cached_property
@@ -214,11 +810,7 @@ class Py:
         if not self.is_valid_syntax:
             return None
 
-        return sum(
-            1
-            for node in ast.walk(self._ast_tree)
-            if isinstance(node, (ast.Import | ast.ImportFrom))
-        )
+        return self._ast_stats.n_imports
 
     @property
     def n_imported_modules(self):
@@ -242,20 +834,22 @@ class Py:
         if not self.is_valid_syntax:
             return None
 
-        modules = set()
+        return len(self._imported_modules)
 
-        for node in ast.walk(self._ast_tree):
-            if isinstance(node, ast.Import):
-                # Handle: import module, import module.submodule
-                for alias in node.names:
-                    modules.add(alias.name.split(".")[0])
+    @functools.cached_property
+    def _imported_modules(self):
+        """Cache the set of top-level modules imported by the code."""
+        return self._ast_stats.imported_modules
 
-            elif isinstance(node, ast.ImportFrom):
-                # Handle: from module import something
-                if node.module:  # Skip relative imports (from . import ...)
-                    modules.add(node.module.split(".")[0])
+    @functools.cached_property
+    def _ast_stats(self):
+        """
+        Cache the metrics collected in one walk of the AST.
 
-        return len(modules)
+        Imports, cyclomatic complexity, user-defined names and docstrings are all
+        read from this walk, instead of each walking the tree again.
+        """
+        return _walk_stats(self._ast_tree)
 
     def mccabe(self, total=False, use_median=False):
         """
@@ -281,54 +875,21 @@ class Py:
         if not self.is_valid_syntax:
             return None
 
-        def count_complexity_nodes(node):
-            """Count nodes that contribute to cyclomatic complexity."""
-            complexity = 0
-            for child in ast.walk(node):
-                if isinstance(
-                    child,
-                    (
-                        ast.If
-                        | ast.While
-                        | ast.For
-                        | ast.AsyncFor
-                        | ast.Try
-                        | ast.ExceptHandler
-                        | ast.With
-                        | ast.AsyncWith
-                        | ast.BoolOp  # and, or operators
-                    ),
-                ):
-                    complexity += 1
-                elif isinstance(child, ast.comprehension):
-                    # List/dict/set comprehensions with conditions
-                    complexity += len(child.ifs)
-            return complexity
+        module_complexity, complexities = self._mccabe
 
         if total:
-            # Count all complexity in the module + base complexity of 1.
-            return 1 + count_complexity_nodes(self._ast_tree)
-        else:
-            # Per-function statistics
-            function_nodes = [
-                node
-                for node in ast.walk(self._ast_tree)
-                if isinstance(node, (ast.FunctionDef | ast.AsyncFunctionDef))
-            ]
+            return module_complexity
 
-            if not function_nodes:
-                return 0
+        if not complexities:
+            return 0
 
-            complexities = []
-            for func_node in function_nodes:
-                # Each function starts with complexity 1, plus decision points
-                func_complexity = 1 + count_complexity_nodes(func_node)
-                complexities.append(func_complexity)
+        return _average(complexities, use_median)
 
-            if use_median:
-                return pd.Series(complexities).median()
-            else:
-                return pd.Series(complexities).mean()
+    @functools.cached_property
+    def _mccabe(self):
+        """Cache the module complexity and the complexity of each function."""
+        stats = self._ast_stats
+        return stats.module_complexity, stats.function_complexities
 
     def cognitive_complexity(self, total=False, use_median=False):
         """
@@ -360,24 +921,30 @@ class Py:
         if not self.is_valid_syntax:
             return None
 
-        result = complexipy.code_complexity(self.content)
+        module_complexity, complexities = self._cognitive
 
         if total:
-            return result.complexity
+            return module_complexity
+
+        if not complexities:
+            return 0
+
+        return _average(complexities, use_median)
+
+    @functools.cached_property
+    def _cognitive(self):
+        """Cache the total cognitive complexity and that of each function."""
+        # The content is passed even when Py was given a path, because
+        # complexipy.file_complexity reads and parses the file just as slowly.
+        result = complexipy.code_complexity(self.content)
 
         # Extract individual function complexities
         if hasattr(result, "functions") and result.functions:
             complexities = [func.complexity for func in result.functions]
         else:
-            return 0
-
-        if not complexities:
-            return 0
+            complexities = []
 
-        if use_median:
-            return pd.Series(complexities).median()
-        else:
-            return pd.Series(complexities).mean()
+        return result.complexity, complexities
 
     def halstead(self, total=False, use_median=False):
         """
@@ -411,71 +978,48 @@ class Py:
             If total=False: Mean or median metrics per function.
             Returns Series with zeros if no functions found or parsing fails.
         """
-        zero_series = pd.Series(
-            {
-                "vocabulary": 0.0,
-                "length": 0.0,
-                "volume": 0.0,
-                "difficulty": 0.0,
-                "effort": 0.0,
-            }
-        )
-
         if not self.is_valid_syntax:
-            return zero_series.replace(0, None)
-
-        halstead_data = radon.metrics.h_visit(self.content)
+            # A scalar None would be filled in as NaN, so give one None per metric.
+            return _halstead_series([None] * len(_HALSTEAD_METRICS), dtype=object)
 
         if total:
             # Get total metrics for entire source
-            total_report = halstead_data.total
-            return pd.Series(
-                {
-                    "vocabulary": float(total_report.vocabulary),
-                    "length": float(total_report.length),
-                    "volume": float(total_report.volume),
-                    "difficulty": float(total_report.difficulty),
-                    "effort": float(total_report.effort),
-                }
+            total_report = radon.metrics.halstead_visitor_report(self._halstead)
+            return _halstead_series(
+                [float(getattr(total_report, metric)) for metric in _HALSTEAD_METRICS]
             )
-        else:
-            # Per-function statistics
-            if not halstead_data.functions:
-                return zero_series
-
-            # Get HalsteadReport objects for each function
-            function_reports = [report for _, report in halstead_data.functions]
-
-            # Extract metric arrays
-            vocabularies = [report.vocabulary for report in function_reports]
-            lengths = [report.length for report in function_reports]
-            volumes = [report.volume for report in function_reports]
-            difficulties = [report.difficulty for report in function_reports]
-            efforts = [report.effort for report in function_reports]
-
-            # Calculate mean or median using pandas
-            if use_median:
-                return pd.Series(
-                    {
-                        "vocabulary": float(pd.Series(vocabularies).median()),
-                        "length": float(pd.Series(lengths).median()),
-                        "volume": float(pd.Series(volumes).median()),
-                        "difficulty": float(pd.Series(difficulties).median()),
-                        "effort": float(pd.Series(efforts).median()),
-                    }
-                )
-            else:
-                return pd.Series(
-                    {
-                        "vocabulary": float(pd.Series(vocabularies).mean()),
-                        "length": float(pd.Series(lengths).mean()),
-                        "volume": float(pd.Series(volumes).mean()),
-                        "difficulty": float(pd.Series(difficulties).mean()),
-                        "effort": float(pd.Series(efforts).mean()),
-                    }
+
+        # Per-function statistics
+        function_reports = self._halstead.functions
+        if not function_reports:
+            return _halstead_series(0.0)
+
+        return _halstead_series(
+            [
+                _average(
+                    [getattr(report, metric) for report in function_reports],
+                    use_median,
                 )
+                for metric in _HALSTEAD_METRICS
+            ]
+        )
 
-    @property
+    @functools.cached_property
+    def _halstead(self):
+        """Cache the operators and operands seen and the report of each function."""
+        visitor = radon.visitors.HalsteadVisitor.from_ast(self._ast_tree)
+        return _HalsteadCounts(
+            operators_seen=visitor.operators_seen,
+            operands_seen=visitor.operands_seen,
+            operators=visitor.operators,
+            operands=visitor.operands,
+            functions=[
+                radon.metrics.halstead_visitor_report(function_visitor)
+                for function_visitor in visitor.function_visitors
+            ],
+        )
+
+    @functools.cached_property
     def user_defined_names(self):
         """
         Return all user-defined names in the source code.
@@ -495,113 +1039,17 @@ class Py:
         if not self.is_valid_syntax:
             return Names([])  # Return empty Names object if syntax is invalid
 
-        user_names = set()
-
-        for node in ast.walk(self._ast_tree):
-            # Function definitions
-            if isinstance(node, (ast.FunctionDef | ast.AsyncFunctionDef)):
-                user_names.add(node.name)
-                # Function parameters
-                for arg in node.args.args:
-                    user_names.add(arg.arg)
-                for arg in node.args.posonlyargs:
-                    user_names.add(arg.arg)
-                for arg in node.args.kwonlyargs:
-                    user_names.add(arg.arg)
-                if node.args.vararg:
-                    user_names.add(node.args.vararg.arg)
-                if node.args.kwarg:
-                    user_names.add(node.args.kwarg.arg)
-
-            # Class definitions
-            elif isinstance(node, ast.ClassDef):
-                user_names.add(node.name)
-
-            # Variable assignments
-            elif isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name):
-                        user_names.add(target.id)
-                    elif isinstance(target, ast.Tuple | ast.List):
-                        for elt in target.elts:
-                            if isinstance(elt, ast.Name):
-                                user_names.add(elt.id)
-                    elif isinstance(target, ast.Attribute):
-                        # Class attributes (self.attr = value)
-                        user_names.add(target.attr)
-
-            # Augmented assignments (+=, -=, etc.)
-            elif isinstance(node, ast.AugAssign):
-                if isinstance(node.target, ast.Name):
-                    user_names.add(node.target.id)
-                elif isinstance(node.target, ast.Attribute):
-                    user_names.add(node.target.attr)
-
-            # Annotated assignments (var: type = value)
-            elif isinstance(node, ast.AnnAssign):
-                if isinstance(node.target, ast.Name):
-                    user_names.add(node.target.id)
-                elif isinstance(node.target, ast.Attribute):
-                    user_names.add(node.target.attr)
-
-            # Named expressions (walrus operator :=)
-            elif isinstance(node, ast.NamedExpr):
-                if isinstance(node.target, ast.Name):
-                    user_names.add(node.target.id)
-
-            # For loop variables
-            elif isinstance(node, ast.For):
-                if isinstance(node.target, ast.Name):
-                    user_names.add(node.target.id)
-                elif isinstance(node.target, ast.Tuple | ast.List):
-                    for elt in node.target.elts:
-                        if isinstance(elt, ast.Name):
-                            user_names.add(elt.id)
-
-            # Comprehension variables
-            elif isinstance(
-                node, (ast.ListComp | ast.SetComp | ast.DictComp | ast.GeneratorExp)
-            ):
-                for generator in node.generators:
-                    if isinstance(generator.target, ast.Name):
-                        user_names.add(generator.target.id)
-                    elif isinstance(generator.target, ast.Tuple | ast.List):
-                        for elt in generator.target.elts:
-                            if isinstance(elt, ast.Name):
-                                user_names.add(elt.id)
-
-            # Exception handling variables
-            elif isinstance(node, ast.ExceptHandler):
-                if node.name:
-                    user_names.add(node.name)
-
-            # With statement variables
-            elif isinstance(node, ast.withitem):
-                if node.optional_vars:
-                    if isinstance(node.optional_vars, ast.Name):
-                        user_names.add(node.optional_vars.id)
-                    elif isinstance(node.optional_vars, ast.Tuple | ast.List):
-                        for elt in node.optional_vars.elts:
-                            if isinstance(elt, ast.Name):
-                                user_names.add(elt.id)
-
-            # Global and nonlocal declarations
-            elif isinstance(node, ast.Global):
-                for name in node.names:
-                    user_names.add(name)
-            elif isinstance(node, ast.Nonlocal):
-                for name in node.names:
-                    user_names.add(name)
-
+        # Comparing slices (name[:2] == "__") is over twice as slow here, because
+        # each slice allocates a new string.
         return Names(
             {
                 name
-                for name in user_names - {"self", "cls"}
+                for name in self._ast_stats.names - {"self", "cls"}
                 if not name.startswith("__") and not name.endswith("__")
             }
         )  # Exclude common names
 
-    @property
+    @functools.cached_property
     def comments(self):
         """
         Return all comments found in the source code.
@@ -617,9 +1065,13 @@ class Py:
         """
         from codelytics import TextAnalysis  # noqa: PLC0415
 
-        if not self.is_valid_syntax:
+        # Without a "#" there can be no comment, so tokenizing is skipped.
+        if not self.is_valid_syntax or "#" not in self.content:
             return TextAnalysis([])
 
+        # This is the only full tokenization of the source: generate_tokens already
+        # runs the C tokenizer, and radon.raw tokenizes each logical line on its own,
+        # so a cached token list would have no other reader.
         comments = []
         tokens = tokenize.generate_tokens(io.StringIO(self.content).readline)
 
@@ -631,13 +1083,15 @@ class Py:
 
         return TextAnalysis(comments)
 
-    @property
+    @functools.cached_property
     def docstrings(self):
         """
         Return all docstrings found in the source code.
 
         Extracts docstrings from modules, classes, functions, and methods.
         A docstring is the first string literal in a module, class, or function body.
+        The result is cached, so ``lloc`` and repeated metric calls reuse one
+        ``TextAnalysis`` (with its cached per-text counts).
 
         Returns
         -------
@@ -650,29 +1104,104 @@ class Py:
         if not self.is_valid_syntax:
             return TextAnalysis([])
 
-        docstrings = []
-
-        def extract_docstring(node):
-            """Extract docstring from a node if it exists."""
-            if (
-                node.body
-                and isinstance(node.body[0], ast.Expr)
-                and isinstance(node.body[0].value, ast.Constant)
-                and isinstance(node.body[0].value.value, str)
-            ):
-                return node.body[0].value.value.strip()
-            return None
+        return TextAnalysis(self._ast_stats.docstrings)
+
+
+class _PyAggregate(Py):
+    """
+    Metrics of many Python sources combined from their summaries.
+
+    Created by ``Py.aggregate``. The cached metric parts of Py are filled from the
+    summaries, so the metric methods of Py work unchanged.
+    """
+
+    def __init__(self, summaries):
+        from codelytics import Names, TextAnalysis  # noqa: PLC0415
+
+        self.content = None
+        self.is_valid_syntax = True
+        self._n_char = sum(summary.n_char for summary in summaries)
+        self._n_imports = sum(summary.n_imports for summary in summaries)
+        self._n_functions = _sum_known(summary.n_functions for summary in summaries)
+        self._n_classes = _sum_known(summary.n_classes for summary in summaries)
+
+        reports = [s.radon_analysis for s in summaries if s.radon_analysis is not None]
+        self.radon_analysis = (
+            type(reports[0])(*map(sum, zip(*reports, strict=True))) if reports else None
+        )
+
+        self._imported_modules = set().union(*(s.imported_modules for s in summaries))
+
+        # The module complexity includes a base complexity of 1 only once.
+        self._mccabe = (
+            1 + sum(summary.mccabe[0] - 1 for summary in summaries),
+            [c for summary in summaries for c in summary.mccabe[1]],
+        )
+        self._cognitive = (
+            sum(summary.cognitive[0] for summary in summaries),
+            [c for summary in summaries for c in summary.cognitive[1]],
+        )
+        self._halstead = _HalsteadCounts(
+            operators_seen=set().union(*(s.halstead.operators_seen for s in summaries)),
+            operands_seen=set().union(*(s.halstead.operands_seen for s in summaries)),
+            operators=sum(summary.halstead.operators for summary in summaries),
+            operands=sum(summary.halstead.operands for summary in summaries),
+            functions=[f for summary in summaries for f in summary.halstead.functions],
+        )
+
+        self.comments = TextAnalysis([t for s in summaries for t in s.comments])
+        self.docstrings = TextAnalysis([t for s in summaries for t in s.docstrings])
+        self.user_defined_names = Names(set().union(*(s.names for s in summaries)))
+
+    @property
+    def _ast_tree(self):
+        raise AttributeError("Aggregated metrics do not have a single AST")
+
+    @property
+    def n_char(self):
+        return self._n_char
+
+    @property
+    def n_functions(self):
+        return self._n_functions
+
+    @property
+    def n_classes(self):
+        return self._n_classes
+
+    @property
+    def n_imports(self):
+        return self._n_imports
+
+
+def _analyse_file(path, metrics):
+    """Compute the metrics of one Python file (module-level, so it is picklable)."""
+    py = Py(path)
+    values = []
+    for metric in metrics:
+        value = getattr(py, metric)
+        values.append(value() if callable(value) else value)
+    return values
+
+
+def _average(values, use_median=False):
+    """
+    Return the mean or median of a non-empty list of numbers as a float.
+
+    The lists hold one value per function, so the statistics module is used rather
+    than building a pandas Series for each call.
+    """
+    return float(statistics.median(values)) if use_median else statistics.fmean(values)
+
 
-        # Module docstring
-        module_docstring = extract_docstring(self._ast_tree)
-        if module_docstring:
-            docstrings.append(module_docstring)
+def _halstead_series(values, dtype=None):
+    """Return Halstead metrics as a Series indexed by the metric names."""
+    # Each Series gets a view of the shared index, so renaming the index of one
+    # result does not rename that of the others.
+    return pd.Series(values, index=_HALSTEAD_INDEX.view(), dtype=dtype)
 
-        # Walk through all nodes to find classes and functions
-        for node in ast.walk(self._ast_tree):
-            if isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef):
-                docstring = extract_docstring(node)
-                if docstring:
-                    docstrings.append(docstring)
 
-        return TextAnalysis(docstrings)
+def _sum_known(values):
+    """Sum the values that are not None, or return None if all of them are None."""
+    values = [value for value in values if value is not None]
+    return sum(values) if values else None
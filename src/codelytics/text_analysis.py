@@ -1,8 +1,60 @@
+import functools
 import re
 
-import pandas as pd
+import numpy as np
 from spellchecker import SpellChecker
 
+# Patterns are compiled once at import time instead of on every call (and, for
+# why_or_what, for every text).
+_SENTENCE = re.compile(r"[A-Z][^.!?]*[.!?]")
+_NON_WORD = re.compile(r"[^\w]")
+
+# Strong 'why' indicators (higher weight)
+_STRONG_WHY = tuple(
+    re.compile(pattern)
+    for pattern in [
+        r"\b(because|since|due to|reason|rationale)\b",
+        r"\b(to avoid|to prevent|to ensure|to guarantee)\b",
+        r"\b(performance|optimization|efficiency|speed)\b",
+        r"\b(security|safety|protection|vulnerability)\b",
+        r"\b(compatibility|support|legacy|backwards)\b",
+        r"\b(hack|workaround|fixme|todo)\b",
+        r"\b(important|warning|note|careful|attention)\b",
+        r"\b(design decision|trade-?off|compromise)\b",
+        r"\b(expensive|slow|fast|improve|better)\b",
+    ]
+)
+
+# Moderate 'why' indicators
+_MODERATE_WHY = tuple(
+    re.compile(pattern)
+    for pattern in [
+        r"\b(bug|issue|problem|fix)\b",
+        r"\b(requirement|needed|necessary)\b",
+        r"\b(limitation|constraint|restriction)\b",
+        r"\b(assumption|expect|assume)\b",
+        r"\b(why|purpose|motivation)\b",
+    ]
+)
+
+# Strong 'what' indicators (only descriptive actions without rationale)
+_STRONG_WHAT = tuple(
+    re.compile(pattern)
+    for pattern in [
+        r"^(initialize|setup|configure|prepare)\b",
+        r"^(get|set|create|delete|update|modify)\b",
+        r"^(call|invoke|execute|run|process)\b",
+        r"^(return|output|result|value)\b",
+        r"^(loop|iterate|through|over)\b",
+        r"^(calculate|compute|determine|find)\b",
+        r"^(parse|format|convert|transform)\b",
+        r"^(store|save|load|read|write)\b",
+        r"^(sort|filter|search|match)\b",
+        r"^(print|display|show|log)\b",
+        r"\b(this function|this method|here we)\b",
+    ]
+)
+
 
 class TextAnalysis:
     """
@@ -16,6 +68,12 @@ class TextAnalysis:
     texts : list of str
         List of text strings to analyze.
 
+    Notes
+    -----
+    Per-text counts are computed once per metric and cached, so requesting the
+    total, mean, and median of a metric only analyses the texts once. ``texts``
+    should therefore not be modified after the first metric is requested.
+
     """
 
     def __init__(self, texts):
@@ -29,17 +87,23 @@ class TextAnalysis:
         """Return text at the specified index."""
         return self.texts[index]
 
+    @staticmethod
+    def _counts(values):
+        """Convert per-text counts to an integer array."""
+        return np.fromiter(values, dtype=np.int64)
+
     def _stat(self, values, total=False, use_median=False):
-        """Calculate statistics from values."""
-        if not values:
+        """Calculate statistics from an array of per-text values."""
+        if not values.size:
             return 0
 
         if total:
-            return sum(values)
-        elif use_median:
-            return float(pd.Series(values).median())
+            return int(values.sum())
+
+        if use_median:
+            return float(np.median(values))
         else:
-            return float(pd.Series(values).mean())
+            return float(values.mean())
 
     def n_words(self, total=False, use_median=False):
         """
@@ -60,8 +124,12 @@ class TextAnalysis:
         int or float
             Total, mean, or median word count.
         """
-        word_counts = [len(text.split()) for text in self.texts]
-        return self._stat(word_counts, total, use_median)
+        return self._stat(self._word_counts, total, use_median)
+
+    @functools.cached_property
+    def _word_counts(self):
+        """Number of words in each text."""
+        return self._counts(len(text.split()) for text in self.texts)
 
     def n_chars(self, total=False, use_median=False):
         """
@@ -82,8 +150,12 @@ class TextAnalysis:
         int or float
             Total, mean, or median character count.
         """
-        char_counts = [len(text) for text in self.texts]
-        return self._stat(char_counts, total, use_median)
+        return self._stat(self._char_counts, total, use_median)
+
+    @functools.cached_property
+    def _char_counts(self):
+        """Number of characters in each text."""
+        return self._counts(len(text) for text in self.texts)
 
     def n_non_ascii(self, total=False, use_median=False):
         """
@@ -104,11 +176,16 @@ class TextAnalysis:
         int or float
             Total, mean, or median non-ASCII character count.
         """
-        non_ascii_counts = []
-        for text in self.texts:
-            count = len([char for char in text if ord(char) > 127])
-            non_ascii_counts.append(count)
-        return self._stat(non_ascii_counts, total, use_median)
+        return self._stat(self._non_ascii_counts, total, use_median)
+
+    @functools.cached_property
+    def _non_ascii_counts(self):
+        """Number of non-ASCII characters in each text."""
+        # str.isascii is a single C-level check, so ASCII texts skip the char loop.
+        return self._counts(
+            0 if text.isascii() else sum(1 for char in text if ord(char) > 127)
+            for text in self.texts
+        )
 
     def n_sentences(self, total=False, use_median=False):
         """
@@ -132,14 +209,12 @@ class TextAnalysis:
         int or float
             Total, mean, or median sentence count.
         """
-        sentence_counts = []
-        sentence_pattern = re.compile(r"[A-Z][^.!?]*[.!?]")
-
-        for text in self.texts:
-            sentences = sentence_pattern.findall(text)
-            sentence_counts.append(len(sentences))
+        return self._stat(self._sentence_counts, total, use_median)
 
-        return self._stat(sentence_counts, total, use_median)
+    @functools.cached_property
+    def _sentence_counts(self):
+        """Number of sentences in each text."""
+        return self._counts(len(_SENTENCE.findall(text)) for text in self.texts)
 
     def misspelled_words(self, total=False, use_median=False):
         """
@@ -164,6 +239,11 @@ class TextAnalysis:
             Total, mean, or median misspelled word count.
             Returns 0 or 0.0 if spellchecker is not available.
         """
+        return self._stat(self._misspelled_counts, total, use_median)
+
+    @functools.cached_property
+    def _misspelled_counts(self):
+        """Number of misspelled words in each text (spell checking is expensive)."""
         try:
             spell = SpellChecker()
             misspelled_counts = []
@@ -175,7 +255,7 @@ class TextAnalysis:
 
                 for word in words:
                     # Remove punctuation and convert to lowercase
-                    cleaned_word = re.sub(r"[^\w]", "", word.lower())
+                    cleaned_word = _NON_WORD.sub("", word.lower())
 
                     # Only include words that are likely actual words.
                     if (
@@ -190,11 +270,11 @@ class TextAnalysis:
                 misspelled = spell.unknown(cleaned_words)
                 misspelled_counts.append(len(misspelled))
 
-            return self._stat(misspelled_counts, total, use_median)
+            return self._counts(misspelled_counts)
 
         except ImportError:
             # Fallback if pyspellchecker is not available
-            return 0
+            return self._counts(())
 
     def why_or_what(self, total=False, use_median=False):
         """
@@ -220,6 +300,11 @@ class TextAnalysis:
             Total, mean, or median count of texts that explain 'why'.
             Returns 0 or 0.0 if no texts found.
         """
+        return self._stat(self._why_counts, total, use_median)
+
+    @functools.cached_property
+    def _why_counts(self):
+        """1 for each text that explains 'why' and 0 for each that explains 'what'."""
         why_counts = []
 
         for text in self.texts:
@@ -231,53 +316,16 @@ class TextAnalysis:
             why_score = 0
             what_score = 0
 
-            # Strong 'why' indicators (higher weight)
-            strong_why_patterns = [
-                r"\b(because|since|due to|reason|rationale)\b",
-                r"\b(to avoid|to prevent|to ensure|to guarantee)\b",
-                r"\b(performance|optimization|efficiency|speed)\b",
-                r"\b(security|safety|protection|vulnerability)\b",
-                r"\b(compatibility|support|legacy|backwards)\b",
-                r"\b(hack|workaround|fixme|todo)\b",
-                r"\b(important|warning|note|careful|attention)\b",
-                r"\b(design decision|trade-?off|compromise)\b",
-                r"\b(expensive|slow|fast|improve|better)\b",
-            ]
-
-            for pattern in strong_why_patterns:
-                matches = len(re.findall(pattern, text_lower))
+            for pattern in _STRONG_WHY:
+                matches = len(pattern.findall(text_lower))
                 why_score += matches * 3  # Higher weight for strong indicators
 
-            # Moderate 'why' indicators
-            moderate_why_patterns = [
-                r"\b(bug|issue|problem|fix)\b",
-                r"\b(requirement|needed|necessary)\b",
-                r"\b(limitation|constraint|restriction)\b",
-                r"\b(assumption|expect|assume)\b",
-                r"\b(why|purpose|motivation)\b",
-            ]
-
-            for pattern in moderate_why_patterns:
-                matches = len(re.findall(pattern, text_lower))
+            for pattern in _MODERATE_WHY:
+                matches = len(pattern.findall(text_lower))
                 why_score += matches * 2
 
-            # Strong 'what' indicators (only descriptive actions without rationale)
-            strong_what_patterns = [
-                r"^(initialize|setup|configure|prepare)\b",
-                r"^(get|set|create|delete|update|modify)\b",
-                r"^(call|invoke|execute|run|process)\b",
-                r"^(return|output|result|value)\b",
-                r"^(loop|iterate|through|over)\b",
-                r"^(calculate|compute|determine|find)\b",
-                r"^(parse|format|convert|transform)\b",
-                r"^(store|save|load|read|write)\b",
-                r"^(sort|filter|search|match)\b",
-                r"^(print|display|show|log)\b",
-                r"\b(this function|this method|here we)\b",
-            ]
-
-            for pattern in strong_what_patterns:
-                matches = len(re.findall(pattern, text_lower))
+            for pattern in _STRONG_WHAT:
+                matches = len(pattern.findall(text_lower))
                 what_score += matches * 2
 
             # Step-by-step indicators (strong 'what')
@@ -306,4 +354,4 @@ class TextAnalysis:
             explains_why = 1 if why_score > what_score else 0
             why_counts.append(explains_why)
 
-        return self._stat(why_counts, total, use_median)
+        return self._counts(why_counts)
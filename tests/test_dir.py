@@ -1,4 +1,8 @@
+import concurrent.futures
+import concurrent.futures.process
+import os
 import pathlib
+import re
 import shutil
 import subprocess
 
@@ -6,10 +10,23 @@ import pandas as pd
 import pytest
 
 import codelytics as cdl
+from codelytics.helpers import is_valid_python
 
 PROJECT_DIR = pathlib.Path(__file__).parent / "data" / "project01"
 
 
+class _BrokenPool(concurrent.futures.ThreadPoolExecutor):
+    """Stand-in for a process pool that breaks after its first task."""
+
+    def submit(self, fn, *args, **kwargs):
+        if getattr(self, "broken", False):
+            future = concurrent.futures.Future()
+            future.set_exception(concurrent.futures.process.BrokenProcessPool())
+            return future
+        self.broken = True
+        return super().submit(fn, *args, **kwargs)
+
+
 @pytest.fixture
 def dir():
     return cdl.Dir(path=PROJECT_DIR)
@@ -81,18 +98,121 @@ class TestGitRepository:
     def test_is_repo_false(self, dir):
         assert not dir.is_repo
 
+    def test_is_repo_cached(self, tmp_path):
+        (tmp_path / ".git").write_text("gitdir: elsewhere")
+        dir = cdl.Dir(tmp_path)
+        assert not dir.is_repo  # .git is not a directory
+
+        (tmp_path / ".git").unlink()
+        (tmp_path / ".git").mkdir()
+        assert not dir.is_repo  # cached
+
+        dir.invalidate()
+        assert dir.is_repo
+
     def test_n_commits_in_repo(self, repo):
         assert repo.n_commits() == 1
         assert repo.n_commits("HEAD") == 1
         assert repo.n_commits("main") == 1
         assert repo.n_commits("--all") == 2
         assert repo.n_commits("feature") == 2
+        assert repo.n_commits("feature", first_parent=True) == 2
+
+    def test_n_commits_cached(self, repo, monkeypatch):
+        assert repo.n_commits() == 1
+
+        subprocess.run(
+            ["git", "commit", "--allow-empty", "-m", "Empty commit"],
+            cwd=repo.path,
+            check=True,
+            capture_output=True,
+        )
+        assert repo.n_commits() == 2  # HEAD moved, so it is counted again
+
+        monkeypatch.setattr(cdl.Dir, "_count_commits", None)  # No recounting.
+        assert repo.n_commits() == 2
+        assert repo.n_commits("main") == 2
+
+    def test_commit_exists(self, repo, dir):
+        assert repo.commit_exists()
+        assert repo.commit_exists("feature")
+        assert not repo.commit_exists("nonexistent")
+
+        with pytest.raises(RuntimeError):
+            dir.commit_exists()
 
     def test_n_commits_non_repo(self, dir):
         with pytest.raises(RuntimeError):
             dir.n_commits()
 
 
+class TestGitPygit2:
+    """The pygit2 backend (from the fast extra) against the git executable."""
+
+    @pytest.fixture(autouse=True)
+    def pygit2(self):
+        return pytest.importorskip("pygit2")
+
+    @pytest.fixture
+    def merged_repo(self, repo):
+        # A merge commit makes first_parent matter, and an annotated tag is a
+        # reference that has to be peeled to a commit for --all.
+        commands = [
+            ["git", "commit", "--allow-empty", "-m", "Main commit"],
+            ["git", "merge", "--no-ff", "-m", "Merge feature", "feature"],
+            ["git", "tag", "-a", "v1", "-m", "Tag", "feature"],
+        ]
+        for cmd in commands:
+            subprocess.run(cmd, cwd=repo.path, check=True, capture_output=True)
+
+        return cdl.Dir(repo.path)
+
+    @staticmethod
+    def _rev_list_count(path, ref, first_parent):
+        args = ["git", "rev-list", "--count"]
+        if first_parent:
+            args.append("--first-parent")
+        result = subprocess.run(
+            [*args, ref], cwd=path, check=True, capture_output=True, text=True
+        )
+        return int(result.stdout)
+
+    @pytest.mark.parametrize(
+        ("ref", "first_parent"),
+        [
+            ("HEAD", False),
+            ("HEAD", True),
+            ("--all", False),
+            ("--all", True),
+            ("feature", True),
+            ("feature", False),
+            ("v1", False),
+        ],
+    )
+    def test_n_commits_same_as_git(self, merged_repo, monkeypatch, ref, first_parent):
+        expected = self._rev_list_count(merged_repo.path, ref, first_parent)
+
+        assert merged_repo.n_commits(ref, first_parent=first_parent) == expected
+        assert merged_repo._repository is not None  # Counted with pygit2.
+
+        monkeypatch.setattr("codelytics.dir.pygit2", None)
+        git_repo = cdl.Dir(merged_repo.path)
+        assert git_repo.n_commits(ref, first_parent=first_parent) == expected
+
+    def test_commit_exists_same_as_git(self, repo, monkeypatch):
+        git_repo = cdl.Dir(repo.path)
+        for ref in ["HEAD", "feature", "nonexistent"]:
+            exists = repo.commit_exists(ref)
+            with monkeypatch.context() as m:
+                m.setattr("codelytics.dir.pygit2", None)
+                assert git_repo.commit_exists(ref) is exists
+        assert repo._repository is not None  # Looked up with pygit2.
+        assert not repo.commit_exists("nonexistent")
+
+        with pytest.raises(RuntimeError):
+            repo.n_commits("nonexistent")
+
+
 class TestFileIteration:
     def test_iter_empty_directory(self, tmp_path):
         dir = cdl.Dir(tmp_path)
@@ -106,6 +226,21 @@ class TestFileIteration:
         assert all(isinstance(f, pathlib.Path) for f in files)
         assert all(f.is_file() for f in files)
 
+    def test_iter_unreadable_subdirectory(self, tmp_path, monkeypatch):
+        (tmp_path / "locked").mkdir()
+        (tmp_path / "locked" / "hidden.py").write_text("x = 1")
+        (tmp_path / "visible.py").write_text("x = 1")
+
+        scandir = os.scandir
+
+        def fake_scandir(path):
+            if pathlib.Path(path).name == "locked":
+                raise PermissionError(path)
+            return scandir(path)
+
+        monkeypatch.setattr(os, "scandir", fake_scandir)
+        assert [f.name for f in cdl.Dir(tmp_path)] == ["visible.py"]
+
     def test_iter_files_py(self, dir):
         py_files = list(dir.iter_files("py"))
 
@@ -124,6 +259,20 @@ class TestFileIteration:
         assert all(f.suffix == ".ipynb" for f in ipynb_files)
         assert len(ipynb_files) > 0
 
+    def test_iter_files_multiple(self, dir):
+        files = list(dir.iter_files(["py", ".md"]))
+
+        assert {f.suffix for f in files} == {".py", ".md"}
+        assert len(files) == dir.n_files("py") + dir.n_files("md")
+
+    def test_iter_files_pattern(self, dir):
+        files = list(dir.iter_files(pattern=r"^(simple|counting)\.py$"))
+        assert sorted(f.name for f in files) == ["counting.py", "simple.py"]
+
+        compiled = re.compile(r"^valid-")
+        files = list(dir.iter_files(suffix="ipynb", pattern=compiled))
+        assert {f.name for f in files} == {"valid-notebook.ipynb"}
+
     def test_iter_files_no_matches(self, dir):
         weird_files = list(dir.iter_files(suffix="weirdsuffix"))
 
@@ -142,6 +291,7 @@ class TestFileCounting:
         assert dir.n_files("py") >= 7
         assert dir.n_files(".py") >= 7
         assert dir.n_files("md") == 1
+        assert dir.n_files(("md", ".ipynb")) == dir.n_files("md") + dir.n_files("ipynb")
 
     def test_files_empty_directory(self, tmp_path):
         dir = cdl.Dir(tmp_path)
@@ -151,6 +301,57 @@ class TestFileCounting:
     def test_files_nonexistent_suffix(self, dir):
         assert dir.n_files("xyz") == 0
 
+    def test_files_single_walk(self, tmp_path, monkeypatch):
+        for name in ["a.py", "b.tar.gz", "c.d/e", ".md", "Makefile"]:
+            (tmp_path / name).parent.mkdir(exist_ok=True)
+            (tmp_path / name).touch()
+        dir = cdl.Dir(tmp_path)
+        assert len(dir) == 5
+
+        monkeypatch.setattr(cdl.Dir, "_scan", None)  # Any further walk would fail.
+        assert dir.n_files("py") == 1
+        assert dir.n_files(("gz", "md")) == 1  # ".md" is a name, not a suffix
+        assert dir.n_files("d") == 0
+        assert dir.n_files("xyz") == 0
+
+    def test_files_multi_dot_suffix(self, tmp_path):
+        (tmp_path / "a.tar.gz").touch()
+        (tmp_path / "b.gz").touch()
+        assert cdl.Dir(tmp_path).n_files("tar.gz") == 1
+
+    def test_files_dotfiles(self, tmp_path):
+        for name in [".bashrc", "..bashrc", ".py", ".config.py", "a.bashrc"]:
+            (tmp_path / name).touch()
+        dir = cdl.Dir(tmp_path)
+
+        # As in os.path.splitext, leading dots are part of the name, not a suffix.
+        for suffix in ["bashrc", "py"]:
+            expected = [f for f in dir if os.path.splitext(f)[1] == f".{suffix}"]
+            assert sorted(dir.iter_files(suffix)) == sorted(expected)
+            assert dir.n_files(suffix) == len(expected)
+        assert dir.n_files("bashrc") == dir.n_files("py") == 1
+        assert dir.stats()["n_files_py"] == 1
+
+    def test_invalidate(self, tmp_path):
+        dir = cdl.Dir(tmp_path)
+        assert dir.n_files("py") == 0
+
+        (tmp_path / "new.py").write_text("x = 1")
+        assert dir.n_files("py") == 0  # cached
+
+        dir.invalidate()
+        assert dir.n_files("py") == 1
+        assert len(dir) == 1
+
+    def test_ignored_dirs(self, tmp_path):
+        for name in [".git/hooks/a.py", "node_modules/b.py", "src/c.py"]:
+            (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / name).write_text("x = 1")
+
+        assert cdl.Dir(tmp_path).n_files("py") == 1
+        assert cdl.Dir(tmp_path, ignore=()).n_files("py") == 3
+        assert cdl.Dir(tmp_path, ignore=["src"]).n_files("py") == 2
+
     def test_invalid_dir(self, dir, invalid_dir):
         # Should not raise an error, but return empty content for invalid files
         assert invalid_dir.n_files("txt") == 0
@@ -180,6 +381,54 @@ class TestExtract:
         with pytest.raises(ValueError):
             dir.extract("invalid_type")
 
+    @pytest.mark.parametrize("content_type", ["code", "markdown"])
+    def test_parallel(self, invalid_dir, monkeypatch, content_type):
+        serial = cdl.Dir(invalid_dir.path).extract(content_type)
+
+        # Force both pools, with a read-ahead window smaller than the tree.
+        monkeypatch.setattr("codelytics.dir._PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr("codelytics.dir._PREFETCH_DEPTH", 2)
+        monkeypatch.setattr(os, "cpu_count", lambda: 2)
+        parallel = cdl.Dir(invalid_dir.path).extract(content_type, workers=2)
+
+        if content_type == "code":
+            assert parallel.content == serial.content
+        else:
+            assert parallel.texts == serial.texts
+
+    def test_parallel_newlines(self, tmp_path, monkeypatch):
+        (tmp_path / "crlf.py").write_bytes(b"x = 1\r\ny = 2\r\n")
+        (tmp_path / "cr.py").write_bytes(b"z = 3\r")
+        serial = cdl.Dir(tmp_path).extract("code")
+
+        monkeypatch.setattr("codelytics.dir._PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr(os, "cpu_count", lambda: 2)
+        parallel = cdl.Dir(tmp_path).extract("code", workers=2)
+
+        assert "\r" not in parallel.content
+        assert parallel.content == serial.content
+
+    @pytest.mark.parametrize(("workers", "cpu_count"), [(None, 2), (1, 2), (2, 1)])
+    def test_no_process_pool(self, invalid_dir, monkeypatch, workers, cpu_count):
+        def process_pool(*args, **kwargs):
+            raise AssertionError("no process pool is started")
+
+        monkeypatch.setattr("codelytics.dir._PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr("codelytics.dir.process_pool", process_pool)
+        monkeypatch.setattr(os, "cpu_count", lambda: cpu_count)
+        code = cdl.Dir(invalid_dir.path).extract("code", workers=workers)
+
+        assert code.content == invalid_dir.extract("code").content
+
+    def test_broken_process_pool(self, invalid_dir, monkeypatch):
+        monkeypatch.setattr("codelytics.dir._PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr("codelytics.dir._PREFETCH_DEPTH", 1)
+        monkeypatch.setattr("codelytics.dir.process_pool", _BrokenPool)
+        monkeypatch.setattr(os, "cpu_count", lambda: 2)
+        code = cdl.Dir(invalid_dir.path).extract("code", workers=2)
+
+        assert code.content == invalid_dir.extract("code").content
+
 
 class TestExtractionInvalid:
     def test_invalid_py(self, invalid_dir):
@@ -198,6 +447,22 @@ class TestExtractionInvalid:
         md_valid = dir.extract("markdown")
         assert md_invalid.texts == md_valid.texts
 
+    def test_malformed_notebooks(self, tmp_path):
+        header = '"nbformat": 4, "nbformat_minor": 5, "metadata": {}'
+        (tmp_path / "no_cells.ipynb").write_text(f"{{{header}}}")
+        (tmp_path / "null_source.ipynb").write_text(
+            f'{{{header}, "cells": [{{"cell_type": "code", "metadata": {{}}, '
+            '"source": null, "outputs": [], "execution_count": null}]}'
+        )
+        (tmp_path / "valid.py").write_text("x = 1\n")
+        d = cdl.Dir(tmp_path)
+
+        assert d.extract("code").content == "x = 1\n"
+        assert d.extract("markdown").texts == [""]
+        stats = d.stats()
+        assert stats["n_files_ipynb"] == 2
+        assert stats["n_cells_total"] == 0
+
 
 class TestStats:
     def test_stats(self, dir):
@@ -206,8 +471,224 @@ class TestStats:
 
         assert stats.loc["docstrings_non_ascii_total"] == 1
 
+    def test_code_metrics_per_file(self, dir):
+        stats = dir.stats()
+        merged = dir.extract("code")
+
+        # The 9 sources (7 Python files and 2 notebooks) are merged with "\n\n"
+        # between them, whose characters and lines the per-file metrics do not count.
+        assert (stats["n_char"], merged.n_char) == (7386, 7402)
+        assert (stats["radon_loc"], merged.radon_analysis.loc) == (300, 315)
+        assert (stats["radon_blank"], merged.radon_analysis.blank) == (75, 90)
+        # No source has a module docstring, so both count the same docstrings.
+        assert stats["docstrings_count"] == len(merged.docstrings) == 15
+        assert stats["lloc"] == merged.lloc == 163
+
+    def test_module_docstrings_per_file(self, tmp_path):
+        (tmp_path / "a.py").write_text('"""A."""\nx = 1\n')
+        (tmp_path / "b.py").write_text('"""B."""\ny = 2\n')
+        d = cdl.Dir(tmp_path)
+        stats = d.stats()
+        merged = d.extract("code")
+
+        # Every module docstring counts, not only that of the first merged file.
+        assert (stats["docstrings_count"], len(merged.docstrings)) == (2, 1)
+        assert (stats["lloc"], merged.lloc) == (2, 3)
+
     def test_stats_keys(self, dir):
         stats = dir.stats()
         stats_nan = cdl.stats_nan(dir.path.name)
 
         assert stats_nan.index.equals(stats.index)
+
+    def test_stats_nan(self):
+        stats_nan = cdl.stats_nan("a")
+        stats_nan["n_commits"] = 1.0
+
+        assert stats_nan.name == "a"
+        assert pd.isna(cdl.stats_nan("b")).all()
+
+    def test_cache_dir(self, tmp_path, monkeypatch):
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "a.py").write_text("x = 1")
+        cache_dir = tmp_path / "cache"
+
+        stats = cdl.Dir(project, cache_dir=cache_dir).stats_dict()
+        assert len(list(cache_dir.glob("*.pkl"))) == 1
+
+        compute_stats = cdl.Dir._compute_stats
+        monkeypatch.setattr(cdl.Dir, "_compute_stats", None)  # No recomputing.
+        assert cdl.Dir(project, cache_dir=cache_dir).stats_dict() == stats
+
+        monkeypatch.setattr(cdl.Dir, "_compute_stats", compute_stats)
+        (project / "b.py").write_text("def f():\n    pass")
+        stats = cdl.Dir(project, cache_dir=cache_dir).stats_dict()
+        assert stats["n_files_py"] == 2
+        assert stats["n_functions"] == 1
+        assert len(list(cache_dir.glob("*.pkl"))) == 1
+        # The summaries of both Python files are cached for later changes.
+        assert len(list((cache_dir / "sources").iterdir())) == 2
+
+    def test_cache_dir_edit_in_place(self, tmp_path):
+        project = tmp_path / "project"
+        project.mkdir()
+        path = project / "a.py"
+        path.write_text("x = 1")
+        d = cdl.Dir(project, cache_dir=tmp_path / "cache")
+        assert d.stats_dict()["n_functions"] == 0
+
+        # An edit that keeps the directory mtime and moves the file mtime backwards
+        # (as restoring a backup or checking out a branch can) is still detected.
+        st = path.stat()
+        path.write_text("def f(): 1")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - 10**9))
+        os.utime(project, ns=(st.st_atime_ns, project.stat().st_mtime_ns))
+        assert d.stats_dict()["n_functions"] == 1
+
+    def test_cache_dir_not_writable(self, tmp_path, dir):
+        # Creating the cache directory fails, since its parent is a file.
+        (tmp_path / "file").write_text("")
+        cache_dir = tmp_path / "file" / "cache"
+
+        stats = cdl.Dir(dir.path, cache_dir=cache_dir).stats_dict()
+        assert stats == dir.stats_dict()
+
+    def test_stats_keys_empty(self, tmp_path):
+        stats = cdl.Dir(tmp_path).stats()
+        stats_nan = cdl.stats_nan(tmp_path.name)
+
+        assert stats_nan.index.equals(stats.index)
+        assert stats.loc["names_chars_total"] == 0
+
+    def test_single_walk(self, dir, monkeypatch):
+        expected = cdl.Dir(dir.path).stats()
+        calls = []
+        scan = cdl.Dir._scan
+
+        def counting_scan(self, *args, **kwargs):
+            calls.append(args)
+            return scan(self, *args, **kwargs)
+
+        monkeypatch.setattr(cdl.Dir, "_scan", counting_scan)
+        stats = dir.stats()
+
+        assert len(calls) == 1
+        pd.testing.assert_series_equal(stats, expected)
+        assert len(dir) == stats.loc["n_files_total"]
+        assert dir.n_files("py") == stats.loc["n_files_py"]
+        assert len(calls) == 1
+
+    @pytest.fixture
+    def notebooks(self, tmp_path):
+        for i, path in enumerate(PROJECT_DIR.rglob("*.ipynb")):
+            shutil.copy(path, tmp_path / f"{i}-{path.name}")
+        return tmp_path
+
+    @pytest.mark.parametrize("pool", ["process", "broken", None])
+    def test_notebooks_workers(self, notebooks, monkeypatch, pool):
+        serial = cdl.Dir(notebooks).stats_dict()
+
+        def no_pool(*args, **kwargs):
+            raise AssertionError("no process pool is started")
+
+        monkeypatch.setattr("codelytics.dir._PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr("codelytics.dir._PREFETCH_DEPTH", 1)
+        monkeypatch.setattr(os, "cpu_count", lambda: 2)
+        if pool == "broken":
+            monkeypatch.setattr("codelytics.dir.process_pool", _BrokenPool)
+        elif pool is None:
+            monkeypatch.setattr("codelytics.dir.process_pool", no_pool)
+        workers = None if pool is None else 2
+        stats = cdl.Dir(notebooks).stats_dict(workers)
+
+        assert stats["n_files_ipynb"] > 1
+        assert stats["n_cells_total"] == serial["n_cells_total"] > 0
+        assert stats == pytest.approx(serial, nan_ok=True)
+
+    def test_notebooks_parsed_once(self, dir, monkeypatch):
+        calls = []
+        parse = cdl.Notebook._parse
+
+        def counting_parse(data, **kwargs):
+            calls.append(data)
+            return parse(data, **kwargs)
+
+        monkeypatch.setattr(cdl.Notebook, "_parse", staticmethod(counting_parse))
+        stats = dir.stats()
+
+        assert len(calls) == dir.n_files("ipynb")
+        assert stats.loc["n_cells_total"] > 0
+
+    def test_python_files_not_checked_twice(self, dir, monkeypatch):
+        calls = []
+
+        def counting_is_valid_python(source, *args):
+            calls.append(source)
+            return is_valid_python(source, *args)
+
+        monkeypatch.setattr("codelytics.dir.is_valid_python", counting_is_valid_python)
+        stats = dir.stats()
+
+        # Py.aggregate parses the files and skips the invalid ones itself.
+        assert not calls
+        assert stats.loc["n_functions"] > 0
+
+    def test_stats_dict(self, dir):
+        stats_dict = dir.stats_dict()
+
+        assert isinstance(stats_dict, dict)
+        assert stats_dict == dir.stats().to_dict()
+
+
+class TestStatsMany:
+    def test_stats_many(self, dir, tmp_path):
+        stats = cdl.stats_many([dir, tmp_path])
+
+        assert list(stats.index) == [dir.path.name, tmp_path.name]
+        assert list(stats.columns) == list(cdl.stats_nan("").index)
+        assert stats.loc[dir.path.name, "n_files_md"] == 1
+        assert stats.loc[tmp_path.name, "n_files_total"] == 0
+
+    def test_empty(self):
+        assert cdl.stats_many([]).empty
+
+    def test_ignore(self, tmp_path):
+        (tmp_path / "venv").mkdir()
+        (tmp_path / "venv" / "a.py").write_text("x = 1")
+
+        assert cdl.stats_many([tmp_path]).loc[tmp_path.name, "n_files_py"] == 0
+        stats = cdl.stats_many([tmp_path], ignore=())
+        assert stats.loc[tmp_path.name, "n_files_py"] == 1
+
+
+class TestScanRepos:
+    def test_code(self, dir, invalid_dir):
+        results = cdl.scan_repos([PROJECT_DIR, invalid_dir.path], "code", workers=2)
+
+        assert len(results) == 2
+        assert all(isinstance(result, cdl.Py) for result in results)
+        assert results[0].content == dir.extract("code").content
+        assert results[1].content == invalid_dir.extract("code").content
+
+    def test_markdown(self, dir):
+        (result,) = cdl.scan_repos([PROJECT_DIR], "markdown", workers=1)
+
+        assert isinstance(result, cdl.TextAnalysis)
+        assert result.texts == dir.extract("markdown").texts
+
+    def test_empty(self):
+        assert cdl.scan_repos([], "code") == []
+
+    def test_ignore(self, tmp_path):
+        (tmp_path / "venv").mkdir()
+        (tmp_path / "venv" / "a.py").write_text("x = 1")
+
+        (result,) = cdl.scan_repos([tmp_path], "code", workers=1)
+        assert result.content == ""
+        (result,) = cdl.scan_repos([tmp_path], "code", workers=1, ignore=())
+        assert result.content == "x = 1"
+
+    def test_invalid_content_type(self):
+        with pytest.raises(ValueError):
+            cdl.scan_repos([PROJECT_DIR], "invalid_type")
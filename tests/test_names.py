@@ -38,6 +38,10 @@ class TestInit:
         assert empty.names == []
         assert len(empty) == 0
 
+    def test_duplicates(self):
+        names = cdl.Names(name for name in ["b", "a", "b", "c", "a"])
+        assert names.names == ["b", "a", "c"]
+
 
 class TestNChars:
     def test_n_chars(self, names):
@@ -87,6 +91,15 @@ class TestCases:
         assert not names.simple.loc["var23"]
         assert names.simple.sum() == 2
 
+    def test_edge_cases(self):
+        names = cdl.Names(["a__b", "a_", "_", "", "aé", "ß", "x٣"])
+
+        assert not names.snake_case.any()
+        assert not names.camel_case.any()
+        assert not names.simple.any()
+        assert names.private.loc["_"]
+        assert names.endswith_number.loc["x٣"]
+
 
 class TestAscii:
     def test_ascii_cases(self, names):
@@ -116,3 +129,8 @@ class TestStats:
         assert result.loc["var23", "n_chars"] == 5
         assert not result.loc["snake_case", "camel_case"]
         assert result.loc["PascalCase", "pascal_case"]
+
+    def test_cached(self, names):
+        assert names.stats is names.stats
+        assert names.camel_case is names.camel_case
+        assert names.camel_case.equals(names.stats["camel_case"])
@@ -24,8 +24,90 @@ class TestInit:
         with pytest.raises(FileNotFoundError):
             cdl.Notebook(PROJECT_DIR / "notebook01.txt")
 
+    def test_data(self, nb):
+        data = nb.path.read_bytes()
+        assert cdl.Notebook(nb.path, data=data).nb == nb.nb
+
+    def test_invalid_data(self, nb):
+        with pytest.raises(ValueError):
+            cdl.Notebook(nb.path, data=b"not a notebook")
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            "",
+            ', "cells": {}',
+            ', "cells": ["x = 1"]',
+            ', "cells": [{"cell_type": "code", "source": null}]',
+            ', "cells": [{"cell_type": "code", "source": ["x = 1", 2]}]',
+        ],
+    )
+    def test_malformed_data(self, nb, body):
+        data = f'{{"nbformat": 4, "nbformat_minor": 5, "metadata": {{}}{body}}}'
+        with pytest.raises(ValueError, match="Invalid notebook file format"):
+            cdl.Notebook(nb.path, data=data)
+
+    def test_source_lines(self, nb):
+        data = (
+            '{"nbformat": 4, "nbformat_minor": 5, "metadata": {}, "cells": '
+            '[{"cell_type": "code", "source": ["x = 1\\n", "y = 2"]}]}'
+        )
+        assert cdl.Notebook(nb.path, data=data).extract("code").content == (
+            "x = 1\ny = 2"
+        )
+
+    def test_nb_lazy(self, nb):
+        notebook = cdl.Notebook(nb.path)
+        assert notebook.extract("code").content == nb.extract("code").content
+        assert notebook.n_cells() == len(nb.nb.cells)
+        assert "nb" not in vars(notebook)  # Not converted to NotebookNode objects
+
+    def test_no_outputs(self, nb):
+        light = cdl.Notebook(nb.path, outputs=False)
+
+        assert any("outputs" in cell for cell in nb.nb.cells)
+        assert not any("outputs" in cell for cell in light.nb.cells)
+        assert light.n_cells() == nb.n_cells()
+        assert light.extract("code").content == nb.extract("code").content
+
+
+class TestJSONDecoding:
+    """Notebooks decoded with orjson (from the fast extra) and with json."""
+
+    @pytest.fixture(autouse=True)
+    def orjson(self):
+        return pytest.importorskip("orjson")
+
+    @staticmethod
+    def _both(path, data, monkeypatch):
+        fast = cdl.Notebook(path, data=data)
+        with monkeypatch.context() as m:
+            m.setattr("codelytics.notebook.orjson", None)
+            slow = cdl.Notebook(path, data=data)
+        return fast, slow
+
+    @pytest.mark.parametrize("path", sorted(PROJECT_DIR.rglob("*.ipynb")))
+    def test_same_as_json(self, path, monkeypatch):
+        fast, slow = self._both(path, path.read_bytes(), monkeypatch)
+        assert fast._nb_dict == slow._nb_dict
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            b"\xef\xbb\xbf" + (PROJECT_DIR / "valid-notebook.ipynb").read_bytes(),
+            b'{"nbformat": 4, "nbformat_minor": 5, "metadata": {"x": NaN}, '
+            b'"cells": [{"cell_type": "code", "source": "x = 1"}]}',
+        ],
+        ids=["bom", "nan"],
+    )
+    def test_rejected_by_orjson(self, nb, orjson, data, monkeypatch):
+        with pytest.raises(orjson.JSONDecodeError):
+            orjson.loads(data)
+
+        fast, slow = self._both(nb.path, data, monkeypatch)
+        assert fast.n_cells() == slow.n_cells() > 0
+        assert fast.extract("code").content == slow.extract("code").content
 
-class TestNCells:
     def test_n_cells(self, nb):
         assert nb.n_cells() == 7
 
@@ -3,6 +3,7 @@ import pathlib
 import pytest
 
 import codelytics as cdl
+from codelytics.pdf import _REFERENCE_HEADING, _REFERENCE_TERMS
 
 
 @pytest.fixture(scope="module")
@@ -19,6 +20,14 @@ class TestInit:
         with pytest.raises(FileNotFoundError):
             cdl.PDF("nonexistent.pdf")
 
+    def test_close(self, pdf):
+        with cdl.PDF(pdf.path) as other:
+            assert other.n_pages == pdf.n_pages
+        assert "_doc" not in vars(other)
+
+        other.close()  # Closing twice is harmless.
+        assert other.count_words() == pdf.count_words()  # Reopened on demand.
+
 
 class TestProperties:
     def test_n_pages(self, pdf):
@@ -26,6 +35,27 @@ class TestProperties:
 
     def test_references_page(self, pdf):
         assert pdf.references_page() == 5
+        assert pdf.references_page(start_fraction=0.4) == 5
+        assert pdf.references_page(start_fraction=1) is None
+
+    def test_references_page_searches_all_pages(self, pdf, monkeypatch):
+        searched = []
+        text = type(pdf)._text
+
+        def recording_text(self, page_idx):
+            searched.append(page_idx)
+            return text(self, page_idx)
+
+        monkeypatch.setattr(type(pdf), "_text", recording_text)
+        monkeypatch.setattr("codelytics.pdf._REFERENCE_TERMS", ())
+        assert pdf.references_page() is None
+        assert sorted(searched) == list(range(pdf.n_pages))
+
+    @pytest.mark.parametrize("term", _REFERENCE_TERMS)
+    def test_reference_headings(self, term):
+        for heading in [term, term.title() + ":", f"7.1. {term.upper()}"]:
+            assert _REFERENCE_HEADING.fullmatch(heading)
+        assert not _REFERENCE_HEADING.fullmatch(f"see {term}")
 
 
 class TestCountWords:
@@ -46,3 +76,13 @@ class TestCountWords:
     def test_gt(self, pdf):
         assert pdf.count_words(ignore_pages=[">5"]) == pdf.count_words()
         assert pdf.count_words(ignore_pages=[">4"]) == pdf.count_words(ignore_pages=[5])
+
+    def test_gt_several(self, pdf):
+        assert pdf.count_words(ignore_pages=[">3", ">1"]) == pdf.count_words(
+            ignore_pages=[">1"]
+        )
+        assert pdf.count_words(ignore_pages=[">1000000"]) == pdf.count_words()
+
+    def test_invalid_entry(self, pdf):
+        with pytest.raises(ValueError):
+            pdf.count_words(ignore_pages=["<3"])
@@ -1,10 +1,18 @@
+import ast
+import itertools
 import pathlib
 
+import complexipy
 import numpy as np
 import pandas as pd
 import pytest
+import radon.complexity
+import radon.raw
+import radon.visitors
 
 import codelytics as cdl
+from codelytics.helpers import cache_version
+from codelytics.py import _count_definitions
 
 PROJECT_DIR = pathlib.Path(__file__).parent / "data" / "project01"
 
@@ -72,6 +80,11 @@ class TestInitialization:
         with pytest.raises(TypeError):
             cdl.Py(123)
 
+    def test_newlines(self, tmp_path):
+        path = tmp_path / "newlines.py"
+        path.write_bytes(b"x = 1\r\ny = 2\rz = 3\n")
+        assert cdl.Py(path).content == "x = 1\ny = 2\nz = 3\n"
+
 
 class TestRadonAnalysis:
     def test_object(self, simple):
@@ -81,6 +94,20 @@ class TestRadonAnalysis:
     def test_loc(self, simple):
         assert simple.radon_analysis.loc == 25  # physical lines of code
 
+    @pytest.mark.parametrize(
+        ("source", "loc"),
+        [
+            ("", 0),
+            ("x = 1", 1),
+            ("x = 1\n", 1),
+            ("x = 1\n\n", 2),
+            ("x = 1\x0cy = 2\n", 2),
+        ],
+    )
+    def test_loc_physical_lines(self, source, loc):
+        # Lines are split as by str.splitlines, so form feeds also end lines.
+        assert cdl.Py(source).radon_analysis.loc == loc == len(source.splitlines())
+
     def test_lloc(self, simple):
         # Multiline docstrings count as one line.
         # Statements that span multiple lines count as one line.
@@ -114,6 +141,32 @@ class TestRadonAnalysis:
         assert simple.radon_analysis.lloc < simple.radon_analysis.sloc
         assert simple.radon_analysis.sloc < simple.radon_analysis.loc
 
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "",
+            "if x: return 0  # c\nelse:\n    a; b\nif y: c; d\n",
+            '"""\nDoc.\n\nMore.\n"""\nx = (\n    1,  # c\n\n)\n',
+            "x = 1 + \\\n    2\n'''one'''\n# only\n\n\n",
+            "f'{x:>10}'; y = {1: 2}\r\n\n\tz = x[1:2]",
+            "x = (1,\n",  # Unclosed bracket
+            "x = 1 + \\\n\n2\n",  # Continued into a blank line
+            ")\n# c)\nx = 1\n",  # Unmatched bracket
+        ],
+    )
+    def test_same_as_radon(self, source):
+        # The raw metrics are computed in one tokenizer pass instead of by radon.
+        try:
+            expected = radon.raw.analyze(source)
+        except SyntaxError:
+            expected = None
+        assert cdl.Py(source).radon_analysis == expected
+
+    def test_same_as_radon_files(self):
+        for path in PROJECT_DIR.rglob("*.py"):
+            content = path.read_text(encoding="utf-8")
+            assert cdl.Py(content).radon_analysis == radon.raw.analyze(content)
+
 
 class TestLLOC:
     def test_simple(self, simple):
@@ -141,11 +194,46 @@ class TestNFunctions:
     def test_empty(self, empty):
         assert empty.n_functions == 0
 
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "if x:\n    def f(): pass\nelse:\n    async def g(): pass\n",
+            "def f():\n    def closure(): pass\n    class Local: pass\n",
+            "class A:\n    try:\n        def m(self): pass\n    except E:\n"
+            "        pass\n    class Inner:\n        def n(self): pass\n",
+            "match x:\n    case 1:\n        def f(): pass\n"
+            "    case _:\n        class B: pass\n",
+        ],
+    )
+    def test_same_as_radon(self, source):
+        blocks = radon.complexity.cc_visit(source)
+        py = cdl.Py(source)
+
+        assert py.n_functions == sum(
+            isinstance(block, radon.visitors.Function) for block in blocks
+        )
+        assert py.n_classes == sum(
+            isinstance(block, radon.visitors.Class) for block in blocks
+        )
+
 
 class TestNClasses:
     def test_simple(self, simple):
         assert simple.n_classes == 0
 
+    def test_counted_with_functions(self, counting, monkeypatch):
+        calls = []
+
+        def counting_definitions(tree):
+            calls.append(tree)
+            return _count_definitions(tree)
+
+        monkeypatch.setattr("codelytics.py._count_definitions", counting_definitions)
+        monkeypatch.setattr(radon.complexity, "cc_visit_ast", None)
+        assert (counting.n_functions, counting.n_classes) == (11, 2)
+        assert (counting.n_classes, counting.n_functions) == (2, 11)
+        assert len(calls) == 1
+
     def test_counting(self, counting):
         assert counting.n_classes == 2
 
@@ -163,6 +251,24 @@ class TestNImports:
     def test_empty(self, empty):
         assert empty.n_imports == 0
 
+    def test_guarded_and_nested(self):
+        py = cdl.Py(
+            "try:\n"
+            "    import ujson as json\n"
+            "except ImportError:\n"
+            "    import json\n"
+            "if TYPE_CHECKING:\n"
+            "    from collections.abc import Iterable\n"
+            "class A:\n"
+            "    def f(self):\n"
+            "        with suppress(ImportError):\n"
+            "            import numpy.linalg\n"
+            "        return lambda: [x for x in __import__('os').listdir()]\n"
+        )
+        # __import__ calls are not import statements.
+        assert py.n_imports == 4
+        assert py.n_imported_modules == 4
+
 
 class TestNImportedModules:
     def test_simple(self, simple):
@@ -215,6 +321,29 @@ class TestMcCabe:
         assert empty.mccabe(total=False, use_median=False) == 0
         assert empty.mccabe(total=False, use_median=True) == 0
 
+    def test_nested(self):
+        py = cdl.Py(
+            "def outer(x):\n"
+            "    if x:\n"
+            "        pass\n"
+            "    def inner(y):\n"
+            "        return [i for i in y if i and x]\n"
+            "    return inner\n"
+        )
+        # The decisions of inner also count for outer and the module.
+        assert py.mccabe(total=True) == 3 + 1
+        assert py.mccabe(total=False, use_median=False) == ((1 + 3) + (1 + 2)) / 2
+
+    def test_walked_once(self, monkeypatch):
+        py = cdl.Py("def f(x):\n    def g(y):\n        if y:\n            pass\n")
+
+        def walk(node):
+            raise AssertionError("functions are not walked again")
+
+        monkeypatch.setattr(ast, "walk", walk)
+        assert py.mccabe(total=True) == 2
+        assert py.mccabe(total=False, use_median=False) == 2
+
 
 class TestCognitiveComplexity:
     def test_simple(self, simple):
@@ -242,6 +371,20 @@ class TestCognitiveComplexity:
         assert empty.cognitive_complexity(total=False) == 0
         assert empty.cognitive_complexity(total=True) == 0
 
+    def test_analysed_once(self, cognitive_complexity, monkeypatch):
+        calls = []
+        code_complexity = complexipy.code_complexity
+
+        def counting_code_complexity(code):
+            calls.append(code)
+            return code_complexity(code)
+
+        monkeypatch.setattr(complexipy, "code_complexity", counting_code_complexity)
+        for total, use_median in itertools.product([True, False], repeat=2):
+            cognitive_complexity.cognitive_complexity(total, use_median)
+
+        assert len(calls) == 1
+
 
 class TestHalstead:
     def test_simple(self, simple):
@@ -296,6 +439,38 @@ class TestHalstead:
     def test_empty(self, empty):
         assert empty.halstead(total=False).mean() == 0.0
 
+    def test_analysed_once(self, halstead, monkeypatch):
+        calls = []
+        from_ast = radon.visitors.HalsteadVisitor.from_ast
+
+        def counting_from_ast(*args, **kwargs):
+            calls.append(args)
+            return from_ast(*args, **kwargs)
+
+        monkeypatch.setattr(
+            radon.visitors.HalsteadVisitor, "from_ast", counting_from_ast
+        )
+        halstead.halstead(total=True)
+        n_calls = len(calls)  # The visitor also visits each function on its own.
+        for total, use_median in itertools.product([True, False], repeat=2):
+            halstead.halstead(total, use_median)
+
+        assert n_calls > 0
+        assert len(calls) == n_calls
+
+    def test_independent_results(self, halstead, invalid_syntax):
+        metrics = halstead.halstead(total=True)
+        metrics.index.name = "metric"
+
+        assert halstead.halstead(total=False).index.name is None
+        assert list(invalid_syntax.halstead().index) == list(metrics.index)
+
+    def test_silent(self, halstead, capsys):
+        for total, use_median in itertools.product([True, False], repeat=2):
+            halstead.halstead(total, use_median)
+
+        assert capsys.readouterr() == ("", "")
+
 
 class TestEdgeCases:
     def test_syntax_error_handling(self, invalid_syntax):
@@ -310,11 +485,30 @@ class TestEdgeCases:
         assert invalid_syntax.mccabe(total=True) is None
         assert not invalid_syntax.is_valid_syntax
         assert invalid_syntax.cognitive_complexity(total=True) is None
-        assert invalid_syntax.halstead(total=False).isna().all()
+        for total, use_median in [(True, False), (False, False), (False, True)]:
+            halstead = invalid_syntax.halstead(total=total, use_median=use_median)
+            assert all(value is None for value in halstead)
         assert invalid_syntax.user_defined_names.names == []
         assert invalid_syntax.comments.texts == []
         assert invalid_syntax.docstrings.texts == []
 
+    def test_parsed_once(self, monkeypatch, mccabe):
+        calls = []
+        parse = ast.parse
+
+        def counting_parse(*args, **kwargs):
+            calls.append(args)
+            return parse(*args, **kwargs)
+
+        monkeypatch.setattr(ast, "parse", counting_parse)
+        for _ in range(2):
+            assert mccabe.is_valid_syntax
+            mccabe.lloc, mccabe.n_functions, mccabe.n_classes
+            mccabe.n_imports, mccabe.n_imported_modules
+            mccabe.mccabe(), mccabe.cognitive_complexity(), mccabe.halstead()
+            mccabe.user_defined_names, mccabe.comments, mccabe.docstrings
+        assert len(calls) == 1
+
 
 class TestUserDefinedNames:
     def test_simple(self, simple):
@@ -350,6 +544,18 @@ class TestUserDefinedNames:
     def test_empty(self, empty):
         assert empty.user_defined_names.names == []
 
+    def test_excluded(self):
+        py = cdl.Py(
+            "class A:\n"
+            "    def __init__(self, __x, cls_):\n"
+            "        self.__mangled = self.trailing__ = self.kept = __x\n"
+            "    @classmethod\n"
+            "    def make(cls):\n"
+            "        return cls\n"
+        )
+        # self, cls, and names starting or ending with a double underscore.
+        assert sorted(py.user_defined_names.names) == ["A", "cls_", "kept", "make"]
+
 
 class TestComments:
     def test_simple(self, simple):
@@ -363,6 +569,11 @@ class TestComments:
         comments = empty.comments
         assert len(comments) == 0
 
+    def test_hash_in_string(self):
+        assert len(cdl.Py("x = 1\n").comments) == 0
+        assert len(cdl.Py("x = '# not a comment'\n").comments) == 0
+        assert list(cdl.Py("x = '#'  # comment\n").comments) == ["comment"]
+
 
 class TestDocstrings:
     def test_simple(self, simple):
@@ -380,3 +591,123 @@ class TestDocstrings:
         assert len(docstrings) == 9
         assert docstrings[0] == "Calculate basic statistics for a dataset."
         assert "Parameters" in docstrings[-1]
+
+    def test_cached(self, counting):
+        assert counting.docstrings is counting.docstrings
+
+
+class TestAggregate:
+    @pytest.fixture
+    def sources(self, counting, mccabe, cognitive_complexity, halstead):
+        return [counting, mccabe, cognitive_complexity, halstead]
+
+    def test_matches_concatenated(self, sources):
+        aggregate = cdl.Py.aggregate(sources)
+        merged = cdl.Py("\n\n".join(py.content for py in sources))
+
+        assert aggregate.n_functions == merged.n_functions
+        assert aggregate.n_classes == merged.n_classes
+        assert aggregate.n_imports == merged.n_imports
+        assert aggregate.n_imported_modules == merged.n_imported_modules
+        assert aggregate.radon_analysis.sloc == merged.radon_analysis.sloc
+        assert aggregate.comments.texts == merged.comments.texts
+        assert sorted(aggregate.user_defined_names.names) == sorted(
+            merged.user_defined_names.names
+        )
+        for total, use_median in [(True, False), (False, False), (False, True)]:
+            assert aggregate.mccabe(total, use_median) == merged.mccabe(
+                total, use_median
+            )
+            assert aggregate.cognitive_complexity(
+                total, use_median
+            ) == merged.cognitive_complexity(total, use_median)
+            pd.testing.assert_series_equal(
+                aggregate.halstead(total, use_median),
+                merged.halstead(total, use_median),
+            )
+
+    def test_separate_sources(self, sources):
+        aggregate = cdl.Py.aggregate(sources)
+
+        # Counts are not inflated by separators between the sources.
+        assert aggregate.n_char == sum(py.n_char for py in sources)
+        assert aggregate.radon_analysis.loc == sum(
+            py.radon_analysis.loc for py in sources
+        )
+        # Each module docstring is counted, not only that of the first source.
+        assert len(aggregate.docstrings) == sum(len(py.docstrings) for py in sources)
+        assert aggregate.content is None
+
+    def test_invalid_and_empty(self, simple, invalid_syntax):
+        assert cdl.Py.aggregate([simple, invalid_syntax]).n_functions == (
+            simple.n_functions
+        )
+        assert cdl.Py.aggregate([]).n_functions == 0
+        assert cdl.Py.aggregate([invalid_syntax]).mccabe(total=True) == 1
+
+    def test_cache_dir(self, sources, invalid_syntax, tmp_path, monkeypatch):
+        sources = [*sources, invalid_syntax]
+        aggregate = cdl.Py.aggregate(sources, cache_dir=tmp_path)
+        assert len(list(tmp_path.iterdir())) == len(sources)
+
+        monkeypatch.setattr(cdl.Py, "_summary", None)  # No analysing.
+        monkeypatch.setattr(cdl.Py, "_ast_tree", None)  # No parsing.
+        cached = cdl.Py.aggregate(
+            [cdl.Py(py.content) for py in sources], cache_dir=tmp_path
+        )
+
+        assert cached.n_functions == aggregate.n_functions
+        assert cached.mccabe(total=True) == aggregate.mccabe(total=True)
+        assert cached.comments.texts == aggregate.comments.texts
+        pd.testing.assert_series_equal(cached.halstead(), aggregate.halstead())
+
+    def test_cache_dir_versions(self, simple, tmp_path, monkeypatch):
+        cdl.Py.aggregate([simple], cache_dir=tmp_path)
+        assert "radon=" in cache_version()
+
+        # Upgrading codelytics or a metric package must not reuse old summaries.
+        monkeypatch.setattr(
+            "codelytics.py.cache_version", lambda: f"{cache_version()}\0radon=0"
+        )
+        cdl.Py.aggregate([cdl.Py(simple.content)], cache_dir=tmp_path)
+        assert len(list(tmp_path.iterdir())) == 2
+
+
+class TestAnalyseMany:
+    @pytest.fixture
+    def paths(self):
+        return sorted(PROJECT_DIR.rglob("*.py"))
+
+    def test_matches_py(self, paths):
+        results = cdl.Py.analyse_many(paths, workers=1)
+
+        assert list(results.index) == [str(path) for path in paths]
+        for path in paths:
+            py = cdl.Py(path)
+            assert results.loc[str(path), "n_functions"] == py.n_functions
+            assert results.loc[str(path), "mccabe"] == py.mccabe()
+
+    def test_parallel(self, paths):
+        # Enough files to use a process pool.
+        paths = paths * 2
+        metrics = ["n_imported_modules", "cognitive_complexity"]
+
+        pd.testing.assert_frame_equal(
+            cdl.Py.analyse_many(paths, metrics, workers=2),
+            cdl.Py.analyse_many(paths, metrics, workers=1),
+        )
+
+    def test_in_worker(self, paths, monkeypatch):
+        def process_pool(*args, **kwargs):
+            raise AssertionError("workers do not start pools of their own")
+
+        monkeypatch.setattr("codelytics.py.in_worker", lambda: True)
+        monkeypatch.setattr("codelytics.py.process_pool", process_pool)
+        results = cdl.Py.analyse_many(paths * 2, ["n_classes"], workers=2)
+
+        assert len(results) == 2 * len(paths)
+
+    def test_empty(self):
+        results = cdl.Py.analyse_many([])
+        assert results.empty
+        assert "mccabe" in results.columns
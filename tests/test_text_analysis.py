@@ -172,6 +172,14 @@ class TestSpellCheck:
         assert simple.misspelled_words() == 0.0
         assert simple.misspelled_words(total=True) == 0
 
+    def test_cached(self, spell_check, monkeypatch):
+        assert spell_check.misspelled_words(total=True) == 3
+
+        # The per-text counts are reused, so the texts are not checked again.
+        monkeypatch.setattr("codelytics.text_analysis.SpellChecker", None)
+        assert spell_check.misspelled_words(total=True) == 3
+        assert spell_check.misspelled_words(use_median=True) == 0
+
 
 class TestWhyOrWhat:
     def test_total(self, why_or_what):